@@ -0,0 +1,117 @@
+"""Review events
+
+Revision ID: 107048a2de44
+Revises: 5f9b43f005d3
+Create Date: 2026-10-19 16:14:08.211739
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '107048a2de44'
+down_revision: Union[str, Sequence[str], None] = '5f9b43f005d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Events are recorded only for open PRs (except 'merged'), so archiving merged PRs stays silent.
+# Bulk loads can opt out with SET LOCAL app.skip_review_events = 'on'.
+RECORD_REVIEW_EVENT = """
+CREATE FUNCTION record_review_event(event_kind text, event_user_pk bigint, event_pull_request_pk bigint)
+RETURNS void LANGUAGE sql AS $$
+    WITH recorded AS (
+        INSERT INTO review_events (user_pk, payload)
+        SELECT u.id, jsonb_build_object(
+            'kind', event_kind,
+            'user_id', u.user_id,
+            'pull_request_id', p.pull_request_id,
+            'pull_request_name', p.pull_request_name,
+            'author_id', a.user_id,
+            'status', p.status
+        )
+        FROM users u
+        JOIN pull_requests p ON p.id = event_pull_request_pk
+        JOIN users a ON a.id = p.author_pk
+        WHERE u.id = event_user_pk AND (p.status = 'OPEN' OR event_kind = 'merged')
+        RETURNING id, payload
+    )
+    SELECT pg_notify('review_events', (payload || jsonb_build_object('id', id))::text) FROM recorded
+$$
+"""
+
+PULL_REQUEST_REVIEWERS_EVENTS = """
+CREATE FUNCTION pull_request_reviewers_events() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('app.skip_review_events', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.user_pk <> NEW.user_pk) THEN
+        PERFORM record_review_event('unassigned', OLD.user_pk, OLD.pull_request_pk);
+    END IF;
+    IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND OLD.user_pk <> NEW.user_pk) THEN
+        PERFORM record_review_event('assigned', NEW.user_pk, NEW.pull_request_pk);
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+PULL_REQUESTS_MERGE_EVENTS = """
+CREATE FUNCTION pull_requests_merge_events() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF current_setting('app.skip_review_events', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM record_review_event('merged', r.user_pk, NEW.id)
+    FROM pull_request_reviewers r
+    WHERE r.pull_request_pk = NEW.id;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('review_events',
+    sa.Column('id', sa.BigInteger(), sa.Identity(always=False), nullable=False),
+    sa.Column('user_pk', sa.BigInteger(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_pk'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_review_events_user_pk_id', 'review_events', ['user_pk', 'id'], unique=False)
+    # ### end Alembic commands ###
+
+    op.execute(RECORD_REVIEW_EVENT)
+    op.execute(PULL_REQUEST_REVIEWERS_EVENTS)
+    op.execute(PULL_REQUESTS_MERGE_EVENTS)
+    op.execute(
+        'CREATE TRIGGER pull_request_reviewers_events AFTER INSERT OR UPDATE OR DELETE ON pull_request_reviewers '
+        'FOR EACH ROW EXECUTE FUNCTION pull_request_reviewers_events()'
+    )
+    op.execute(
+        'CREATE TRIGGER pull_requests_merge_events AFTER UPDATE OF status ON pull_requests '
+        "FOR EACH ROW WHEN (OLD.status = 'OPEN' AND NEW.status = 'MERGED') "
+        'EXECUTE FUNCTION pull_requests_merge_events()'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER pull_requests_merge_events ON pull_requests')
+    op.execute('DROP TRIGGER pull_request_reviewers_events ON pull_request_reviewers')
+    op.execute('DROP FUNCTION pull_requests_merge_events()')
+    op.execute('DROP FUNCTION pull_request_reviewers_events()')
+    op.execute('DROP FUNCTION record_review_event(text, bigint, bigint)')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index('ix_review_events_user_pk_id', table_name='review_events')
+    op.drop_table('review_events')
+    # ### end Alembic commands ###
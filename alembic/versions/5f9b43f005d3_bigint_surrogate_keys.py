@@ -0,0 +1,132 @@
+"""Bigint surrogate keys
+
+Revision ID: 5f9b43f005d3
+Revises: ca34eb035c2b
+Create Date: 2026-10-19 16:09:28.172667
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f9b43f005d3'
+down_revision: Union[str, Sequence[str], None] = 'ca34eb035c2b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+REFERENCES = [
+    # table, string column, new bigint column, referenced table, referenced string column
+    ('users', 'team_name', 'team_pk', 'teams', 'team_name'),
+    ('pull_requests', 'author_id', 'author_pk', 'users', 'user_id'),
+    ('pull_requests_archive', 'author_id', 'author_pk', 'users', 'user_id'),
+    ('pull_request_reviewers', 'user_id', 'user_pk', 'users', 'user_id'),
+    ('pull_request_reviewers', 'pull_request_id', 'pull_request_pk', 'pull_requests', 'pull_request_id'),
+    ('pull_request_reviewers_archive', 'user_id', 'user_pk', 'users', 'user_id'),
+    ('pull_request_reviewers_archive', 'pull_request_id', 'pull_request_pk', 'pull_requests_archive', 'pull_request_id'),
+]
+
+KEYED_TABLES = [
+    ('teams', 'team_name'),
+    ('users', 'user_id'),
+    ('pull_requests', 'pull_request_id'),
+    ('pull_requests_archive', 'pull_request_id'),
+]
+
+REVIEWER_TABLES = ['pull_request_reviewers', 'pull_request_reviewers_archive']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in ('teams', 'users', 'pull_requests'):
+        op.add_column(table, sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False))
+
+    # Archived PRs take ids from the same sequence, so moving a PR to the archive keeps its id
+    op.add_column('pull_requests_archive', sa.Column('id', sa.BigInteger(), nullable=True))
+    op.execute("UPDATE pull_requests_archive SET id = nextval(pg_get_serial_sequence('pull_requests', 'id'))")
+    op.alter_column('pull_requests_archive', 'id', nullable=False)
+
+    for table, column, new_column, referenced, referenced_column in REFERENCES:
+        op.add_column(table, sa.Column(new_column, sa.BigInteger(), nullable=True))
+        op.execute(
+            f'UPDATE {table} SET {new_column} = r.id FROM {referenced} r '
+            f'WHERE r.{referenced_column} = {table}.{column}'
+        )
+        op.alter_column(table, new_column, nullable=False)
+
+    op.drop_index('ix_users_team_name_user_id', table_name='users')
+    op.drop_index('ix_users_available_by_team', table_name='users', postgresql_where=sa.text('is_active IS true'))
+    op.drop_index('ix_pull_request_reviewers_pull_request_id', table_name='pull_request_reviewers')
+
+    for table, column, _, _, _ in REFERENCES:
+        op.drop_constraint(f'{table}_{column}_fkey', table, type_='foreignkey')
+    for table in REVIEWER_TABLES:
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+    for table, column, _, _, _ in REFERENCES:
+        op.drop_column(table, column)
+
+    for table, column in KEYED_TABLES:
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.create_primary_key(f'{table}_pkey', table, ['id'])
+        if table != 'teams':
+            op.create_index(f'ix_{table}_{column}', table, [column], unique=True)
+
+    for table in REVIEWER_TABLES:
+        op.create_primary_key(f'{table}_pkey', table, ['user_pk', 'pull_request_pk'])
+    for table, _, new_column, referenced, _ in REFERENCES:
+        op.create_foreign_key(f'{table}_{new_column}_fkey', table, referenced, [new_column], ['id'])
+
+    op.create_index('ix_users_team_pk_user_id', 'users', ['team_pk', 'user_id'], unique=False)
+    op.create_index(
+        'ix_users_available_by_team', 'users', ['team_pk', 'unavailable_until'],
+        unique=False, postgresql_where=sa.text('is_active IS true')
+    )
+    op.create_index(
+        'ix_pull_request_reviewers_pull_request_pk', 'pull_request_reviewers', ['pull_request_pk'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_pull_request_reviewers_pull_request_pk', table_name='pull_request_reviewers')
+    op.drop_index('ix_users_available_by_team', table_name='users', postgresql_where=sa.text('is_active IS true'))
+    op.drop_index('ix_users_team_pk_user_id', table_name='users')
+
+    for table, column, new_column, referenced, referenced_column in REFERENCES:
+        op.add_column(table, sa.Column(column, sa.String(), nullable=True))
+        op.execute(
+            f'UPDATE {table} SET {column} = r.{referenced_column} FROM {referenced} r '
+            f'WHERE r.id = {table}.{new_column}'
+        )
+        op.alter_column(table, column, nullable=False)
+
+    for table, _, new_column, _, _ in REFERENCES:
+        op.drop_constraint(f'{table}_{new_column}_fkey', table, type_='foreignkey')
+    for table in REVIEWER_TABLES:
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+    for table, _, new_column, _, _ in REFERENCES:
+        op.drop_column(table, new_column)
+
+    for table, column in KEYED_TABLES:
+        if table != 'teams':
+            op.drop_index(f'ix_{table}_{column}', table_name=table)
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.drop_column(table, 'id')
+        op.create_primary_key(f'{table}_pkey', table, [column])
+
+    for table in REVIEWER_TABLES:
+        op.create_primary_key(f'{table}_pkey', table, ['user_id', 'pull_request_id'])
+    for table, column, _, referenced, referenced_column in REFERENCES:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, referenced, [column], [referenced_column])
+
+    op.create_index('ix_users_team_name_user_id', 'users', ['team_name', 'user_id'], unique=False)
+    op.create_index(
+        'ix_users_available_by_team', 'users', ['team_name', 'unavailable_until'],
+        unique=False, postgresql_where=sa.text('is_active IS true')
+    )
+    op.create_index(
+        'ix_pull_request_reviewers_pull_request_id', 'pull_request_reviewers', ['pull_request_id'], unique=False
+    )
@@ -0,0 +1,84 @@
+"""Review event transaction ids
+
+Revision ID: b3e51c9d27f4
+Revises: 0703234c810b
+Create Date: 2026-10-19 17:05:42.918305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e51c9d27f4'
+down_revision: Union[str, Sequence[str], None] = '0703234c810b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+RECORD_REVIEW_EVENT = """
+CREATE OR REPLACE FUNCTION record_review_event(event_kind text, event_user_pk bigint, event_pull_request_pk bigint)
+RETURNS void LANGUAGE sql AS $$
+    WITH recorded AS (
+        INSERT INTO review_events (user_pk, payload)
+        SELECT u.id, jsonb_build_object(
+            'kind', event_kind,
+            'user_id', u.user_id,
+            'pull_request_id', p.pull_request_id,
+            'pull_request_name', p.pull_request_name,
+            'author_id', a.user_id,
+            'status', p.status
+        )
+        FROM users u
+        JOIN pull_requests p ON p.id = event_pull_request_pk
+        JOIN users a ON a.id = p.author_pk
+        WHERE u.id = event_user_pk AND (p.status = 'OPEN' OR event_kind = 'merged')
+        RETURNING id, xid, payload
+    )
+    SELECT pg_notify('review_events', (payload || jsonb_build_object('id', id, 'xid', xid))::text) FROM recorded
+$$
+"""
+
+RECORD_REVIEW_EVENT_WITHOUT_XID = """
+CREATE OR REPLACE FUNCTION record_review_event(event_kind text, event_user_pk bigint, event_pull_request_pk bigint)
+RETURNS void LANGUAGE sql AS $$
+    WITH recorded AS (
+        INSERT INTO review_events (user_pk, payload)
+        SELECT u.id, jsonb_build_object(
+            'kind', event_kind,
+            'user_id', u.user_id,
+            'pull_request_id', p.pull_request_id,
+            'pull_request_name', p.pull_request_name,
+            'author_id', a.user_id,
+            'status', p.status
+        )
+        FROM users u
+        JOIN pull_requests p ON p.id = event_pull_request_pk
+        JOIN users a ON a.id = p.author_pk
+        WHERE u.id = event_user_pk AND (p.status = 'OPEN' OR event_kind = 'merged')
+        RETURNING id, payload
+    )
+    SELECT pg_notify('review_events', (payload || jsonb_build_object('id', id))::text) FROM recorded
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing events get the migration's transaction id, they all predate every later writer
+    op.add_column('review_events', sa.Column(
+        'xid', sa.BigInteger(), server_default=sa.text('pg_current_xact_id()::text::bigint'), nullable=False
+    ))
+    op.drop_index('ix_review_events_user_pk_id', table_name='review_events')
+    op.create_index('ix_review_events_user_pk_xid_id', 'review_events', ['user_pk', 'xid', 'id'], unique=False)
+    op.execute(RECORD_REVIEW_EVENT)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(RECORD_REVIEW_EVENT_WITHOUT_XID)
+    op.drop_index('ix_review_events_user_pk_xid_id', table_name='review_events')
+    op.create_index('ix_review_events_user_pk_id', 'review_events', ['user_pk', 'id'], unique=False)
+    op.drop_column('review_events', 'xid')
@@ -1,9 +1,22 @@
-from .pull_request import pr_router
-from .team import t_router
-from .user import u_router
+from importlib import import_module
 
 
-routers = [pr_router, t_router, u_router]
+_ROUTER_MODULES = {
+    'pr_router': '.pull_request',
+    't_router': '.team',
+    'u_router': '.user',
+    'h_router': '.health',
+    'prof_router': '.profiling',
+    're_router': '.review_events',
+}
 
 
-__all__ = ['routers', 'pr_router', 't_router', 'u_router']
+def __getattr__(name):
+    if name == 'routers':
+        return [__getattr__(router_name) for router_name in _ROUTER_MODULES]
+    if name in _ROUTER_MODULES:
+        return getattr(import_module(_ROUTER_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['routers', 'pr_router', 't_router', 'u_router', 'h_router', 'prof_router', 're_router']
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from fastapi import APIRouter, Response
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import text
+from starlette.status import HTTP_200_OK, HTTP_503_SERVICE_UNAVAILABLE
+
+from api.schemas import HealthLiveSchema, HealthReadySchema
+from config import HEALTH_DB_PING_INTERVAL
+from database.gen_session import engine
+from middleware import in_flight, metrics
+
+h_router = APIRouter(prefix='/health')
+logger = logging.getLogger(__name__)
+
+
+class HealthState:
+    def __init__(self):
+        self.warmed_up = False
+        self.draining = False
+        self.db_ok = False
+        self.db_checked_at: Optional[float] = None
+
+    def record_ping(self, error: Optional[Exception] = None) -> None:
+        # Driver errors name hosts and roles, so they go to the log and /health/ready only reports db_ok
+        if error is not None and (self.db_ok or self.db_checked_at is None):
+            logger.warning('Database check failed, readiness will retry: %s', error)
+        elif error is None and not self.db_ok and self.db_checked_at is not None:
+            logger.info('Database ping recovered')
+
+        self.db_ok = error is None
+        self.db_checked_at = time.monotonic()
+
+    def is_ready(self, max_ping_age: float) -> bool:
+        return (
+            self.warmed_up
+            and not self.draining
+            and self.db_ok
+            and self.db_checked_at is not None
+            and time.monotonic() - self.db_checked_at <= max_ping_age
+        )
+
+
+health_state = HealthState()
+
+
+async def ping_database(interval: float, warm_up_pool: Callable[[], Awaitable]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if not health_state.warmed_up:
+                await asyncio.wait_for(warm_up_pool(), interval)
+                health_state.warmed_up = True
+            else:
+                async with engine.connect() as connection:
+                    await asyncio.wait_for(connection.execute(text('SELECT 1')), interval)
+            health_state.record_ping()
+        except asyncio.CancelledError:
+            raise
+        except Exception as _e:
+            health_state.record_ping(_e)
+
+
+@h_router.get(
+    '/live',
+    response_model=HealthLiveSchema,
+    status_code=HTTP_200_OK
+)
+async def health_live():
+    return HealthLiveSchema(status='alive')
+
+
+@h_router.get(
+    '/ready',
+    response_model=HealthReadySchema,
+    status_code=HTTP_200_OK,
+    responses={HTTP_503_SERVICE_UNAVAILABLE: {'model': HealthReadySchema}}
+)
+async def health_ready(response: Response):
+    ready = health_state.is_ready(max_ping_age=3 * HEALTH_DB_PING_INTERVAL)
+    if not ready:
+        response.status_code = HTTP_503_SERVICE_UNAVAILABLE
+
+    return HealthReadySchema(
+        status='ready' if ready else 'not_ready',
+        warmed_up=health_state.warmed_up,
+        draining=health_state.draining,
+        db_ok=health_state.db_ok,
+        db_checked_ago=(
+            None if health_state.db_checked_at is None
+            else round(time.monotonic() - health_state.db_checked_at, 3)
+        ),
+        in_flight=in_flight.count
+    )
+
+
+@h_router.get(
+    '/metrics',
+    response_class=PlainTextResponse,
+    status_code=HTTP_200_OK
+)
+async def health_metrics():
+    return metrics.render()
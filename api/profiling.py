@@ -0,0 +1,46 @@
+import hmac
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse
+from starlette.status import HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
+
+from config import PROFILING_ENABLED, PROFILE_HEADER, PROFILE_TOKEN, PROFILE_DIR, PROFILE_KEEP
+from telemetry import ProfileStore
+
+prof_router = APIRouter(prefix='/debug')
+
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_KEEP)
+
+
+def _authorize(request: Request):
+    if not PROFILING_ENABLED:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "NOT_FOUND", "message": "Profiling is disabled"}}
+        )
+
+    token = request.headers.get(PROFILE_HEADER, '')
+    if not PROFILE_TOKEN or not hmac.compare_digest(token.encode('latin-1'), PROFILE_TOKEN.encode('latin-1')):
+        raise HTTPException(
+            status_code=HTTP_403_FORBIDDEN,
+            detail={"error": {"code": "FORBIDDEN", "message": f"Valid {PROFILE_HEADER} token required"}}
+        )
+
+
+@prof_router.get('/profiles', response_model=List[str], dependencies=[Depends(_authorize)])
+async def profiles_list():
+    return profile_store.list()
+
+
+@prof_router.get('/profiles/{profile_id}', dependencies=[Depends(_authorize)])
+async def profiles_get(profile_id: str):
+    path = profile_store.find(profile_id)
+    if path is None:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "NOT_FOUND", "message": "Profile not found"}}
+        )
+
+    media_type = 'application/json' if path.endswith('.json') else 'text/plain'
+    return FileResponse(path, media_type=media_type, filename=path.rsplit('/', 1)[-1])
@@ -1,19 +1,27 @@
-from datetime import datetime
-from random import choice
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.status import HTTP_201_CREATED, HTTP_200_OK, HTTP_500_INTERNAL_SERVER_ERROR, HTTP_404_NOT_FOUND, \
     HTTP_400_BAD_REQUEST, HTTP_409_CONFLICT
 
+from api.representation import render
 from api.schemas import PullRequestResponseSchema, PullRequestCreateSchema, PullRequestMergeSchema, \
-    PullRequestReassignResponseSchema, PullRequestReassignSchema
+    PullRequestReassignResponseSchema, PullRequestReassignSchema, PullRequestMergeBatchSchema, \
+    PullRequestMergeBatchResponseSchema, PullRequestInfoSchema, PullRequestSearchPageSchema
+from assignment import select_replacement
+from config import FALLBACK_TEAMS, REVIEWER_SELECTION, ASSIGNMENT_LOCKS
 from database.crud.pull_request_crud import PullRequestCrud
+from database.crud.team_crud import TeamCrud
 from database.crud.user_crud import UserCrud
 from database.gen_session import get_session
-from database.models import PRStatus, PullRequestReviewer
+from telemetry import current_request_id
+from database.models import PRStatus
 
 pr_router = APIRouter(prefix='/pullRequest')
+logger = logging.getLogger(__name__)
 
 
 @pr_router.post(
@@ -26,14 +34,13 @@ async def pull_request_create(
     session: AsyncSession = Depends(get_session)
 ):
     try:
-        existing_pr = await PullRequestCrud.get_by_id(session, pr_data.pull_request_id)
-        if existing_pr:
+        if await PullRequestCrud.exists(session, pr_data.pull_request_id):
             raise HTTPException(
                 status_code=HTTP_409_CONFLICT,
                 detail={"error": {"code": "PR_EXISTS", "message": "PR id already exists"}}
             )
 
-        author = await UserCrud.get_by_id(session, pr_data.author_id)
+        author = await UserCrud.get_row_by_id(session, pr_data.author_id)
         if not author:
             raise HTTPException(
                 status_code=HTTP_404_NOT_FOUND,
@@ -45,13 +52,22 @@ async def pull_request_create(
                 detail={"error": {"code": "AUTHOR_INACTIVE", "message": "Inactive user cannot create PR"}}
             )
 
-        candidates = await UserCrud.get_active_candidates(
-            session=session,
-            team_name=author.team_name,
-            exclude_ids=[author.user_id]
-        )
+        if ASSIGNMENT_LOCKS:
+            await TeamCrud.lock_assignments(session, [author.team_name])
 
-        reviewers_to_assign = await UserCrud.select_reviewers_weighted(candidates)
+        if REVIEWER_SELECTION == 'sql':
+            reviewers_to_assign = await UserCrud.select_reviewers_in_db(
+                session=session,
+                team_name=author.team_name,
+                exclude_ids=[author.user_id]
+            )
+        else:
+            candidates = await UserCrud.get_active_candidates(
+                session=session,
+                team_name=author.team_name,
+                exclude_ids=[author.user_id]
+            )
+            reviewers_to_assign = await UserCrud.select_reviewers_weighted(candidates)
 
         new_pr = await PullRequestCrud.create(
             session=session,
@@ -59,23 +75,48 @@ async def pull_request_create(
             author=author,
             reviewers=reviewers_to_assign
         )
+        reviewers = await PullRequestCrud.get_reviewers_many(session, [new_pr.pull_request_id])
 
         await session.commit()
-        await session.refresh(new_pr)
 
-        return new_pr
+        return PullRequestResponseSchema(
+            pull_request_id=new_pr.pull_request_id,
+            pull_request_name=new_pr.pull_request_name,
+            author_id=author.user_id,
+            status=new_pr.status,
+            created_at=new_pr.created_at,
+            merged_at=new_pr.merged_at,
+            assigned_reviewers=reviewers.get(new_pr.pull_request_id, [])
+        )
 
     except HTTPException as _he:
         await session.rollback()
         raise _he
-    except Exception as _e:
+    except Exception:
+        logger.exception('Unexpected error')
         await session.rollback()
         raise HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "INTERNAL_ERROR", "message": f"Unexpected error: {_e}"}}
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
         )
 
 
+def _pr_response(row, reviewers: Dict[str, List[dict]]) -> PullRequestResponseSchema:
+    return PullRequestResponseSchema(**row._mapping, assigned_reviewers=reviewers.get(row.pull_request_id, []))
+
+
+async def _merge(session: AsyncSession, pull_request_ids: List[str]) -> List[PullRequestResponseSchema]:
+    rows = await PullRequestCrud.merge_many(session, pull_request_ids)
+    reviewers = await PullRequestCrud.get_reviewers_many(session, [row.pull_request_id for row in rows])
+    await session.commit()
+
+    merged = {row.pull_request_id: _pr_response(row, reviewers) for row in rows}
+    return [merged[pr_id] for pr_id in dict.fromkeys(pull_request_ids) if pr_id in merged]
+
+
 @pr_router.post(
     '/merge',
     response_model=PullRequestResponseSchema,
@@ -86,31 +127,61 @@ async def pull_request_merge(
     session: AsyncSession = Depends(get_session)
 ):
     try:
-        pr = await PullRequestCrud.get_by_id(session, pr_data.pull_request_id)
+        merged = await _merge(session, [pr_data.pull_request_id])
 
-        if not pr:
+        if not merged:
             raise HTTPException(
                 status_code=HTTP_404_NOT_FOUND,
                 detail={"error": {"code": "NOT_FOUND", "message": "PR not found"}}
             )
 
-        if pr.status == PRStatus.OPEN:
-            pr.status = PRStatus.MERGED
-            pr.merged_at = datetime.now()
+        return merged[0]
+
+    except HTTPException as _he:
+        await session.rollback()
+        raise _he
+    except Exception:
+        logger.exception('Unexpected error')
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
+        )
+
 
-            await session.commit()
-            await session.refresh(pr)
+@pr_router.post(
+    '/mergeBatch',
+    response_model=PullRequestMergeBatchResponseSchema,
+    status_code=HTTP_200_OK
+)
+async def pull_request_merge_batch(
+    batch_data: PullRequestMergeBatchSchema,
+    session: AsyncSession = Depends(get_session)
+):
+    try:
+        merged = await _merge(session, batch_data.pull_request_ids)
+        found = {pr.pull_request_id for pr in merged}
 
-        return pr
+        return PullRequestMergeBatchResponseSchema(
+            pull_requests=merged,
+            not_found=[pr_id for pr_id in dict.fromkeys(batch_data.pull_request_ids) if pr_id not in found]
+        )
 
     except HTTPException as _he:
         await session.rollback()
         raise _he
-    except Exception as _e:
+    except Exception:
+        logger.exception('Unexpected error')
         await session.rollback()
         raise HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "INTERNAL_ERROR", "message": f"Unexpected error: {_e}"}}
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
         )
 
 
@@ -124,7 +195,7 @@ async def pull_request_reassign(
         session: AsyncSession = Depends(get_session)
 ):
     try:
-        pr = await PullRequestCrud.get_by_id(session, reassign_data.pull_request_id)
+        pr = await PullRequestCrud.get_row_by_id(session, reassign_data.pull_request_id)
 
         if not pr:
             raise HTTPException(
@@ -138,72 +209,144 @@ async def pull_request_reassign(
                 detail={"error": {"code": "PR_MERGED", "message": "cannot reassign on merged PR"}}
             )
 
-        old_user = await UserCrud.get_by_id(session, reassign_data.old_user_id)
+        old_user = await UserCrud.get_row_by_id(session, reassign_data.old_user_id)
         if not old_user:
             raise HTTPException(
                 status_code=HTTP_404_NOT_FOUND,
                 detail={"error": {"code": "NOT_FOUND", "message": "User to be replaced not found"}}
             )
 
-        is_assigned = any(
-            assoc.user_id == old_user.user_id
-            for assoc in pr.reviewer_associations
-        )
+        # Reviewers are read under the lock, a concurrent reassign of the same PR has either finished or waits
+        if ASSIGNMENT_LOCKS:
+            await TeamCrud.lock_assignments(session, [old_user.team_name], FALLBACK_TEAMS)
+
+        reviewers = await PullRequestCrud.get_reviewers_many(session, [pr.pull_request_id])
+        reviewer_ids = [reviewer['user_id'] for reviewer in reviewers.get(pr.pull_request_id, [])]
 
-        if not is_assigned:
+        if old_user.user_id not in reviewer_ids:
             raise HTTPException(
                 status_code=HTTP_409_CONFLICT,
                 detail={"error": {"code": "NOT_ASSIGNED", "message": "Reviewer is not assigned to this PR"}}
             )
 
-        exclude_ids = [pr.author_id]
-        exclude_ids.extend([
-            assoc.user_id for assoc in pr.reviewer_associations
-        ])
+        exclude_ids = [pr.author_id, *reviewer_ids]
 
         candidates = await UserCrud.get_active_candidates(
             session=session,
             team_name=old_user.team_name,
-            exclude_ids=exclude_ids
+            exclude_ids=exclude_ids,
+            fallback_teams=FALLBACK_TEAMS
         )
+        new_reviewer = select_replacement(candidates)
 
-        if not candidates:
+        if new_reviewer is None:
             raise HTTPException(
                 status_code=HTTP_409_CONFLICT,
                 detail={"error": {"code": "NO_CANDIDATE", "message": "No active replacement candidate in team"}}
             )
 
-        new_reviewer = choice(candidates)
-
-        old_association = next(
-            (assoc for assoc in pr.reviewer_associations if assoc.user_id == old_user.user_id),
-            None
-        )
-        if old_association:
-            await session.delete(old_association)
-            await session.flush()
-
-        new_association = PullRequestReviewer(
-            user_id=new_reviewer.user_id,
-            pull_request_id=pr.pull_request_id
+        replaced = await PullRequestCrud.replace_reviewer(
+            session=session,
+            pull_request_id=pr.pull_request_id,
+            old_user_id=old_user.user_id,
+            new_user_id=new_reviewer.user_id
         )
-        session.add(new_association)
-        await session.flush()
+        if not replaced:
+            raise HTTPException(
+                status_code=HTTP_409_CONFLICT,
+                detail={"error": {"code": "NOT_ASSIGNED", "message": "Reviewer is not assigned to this PR"}}
+            )
+        reviewers = await PullRequestCrud.get_reviewers_many(session, [pr.pull_request_id])
 
         await session.commit()
-        await session.refresh(pr)
 
         return PullRequestReassignResponseSchema(
-            pr=pr,
+            pr=_pr_response(pr, reviewers),
             replaced_by=new_reviewer.user_id
         )
 
     except HTTPException as _he:
         await session.rollback()
         raise _he
-    except Exception as _e:
+    except Exception:
+        logger.exception('Unexpected error')
         await session.rollback()
         raise HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "INTERNAL_ERROR", "message": f"Unexpected error: {_e}"}}
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
+        )
+
+
+@pr_router.get(
+    '/get',
+    response_model=PullRequestInfoSchema,
+    status_code=HTTP_200_OK
+)
+async def pull_request_get(
+    pull_request_id: str = Query(...),
+    session: AsyncSession = Depends(get_session)
+):
+    pr = await PullRequestCrud.get_info(session, pull_request_id)
+
+    if not pr:
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "NOT_FOUND", "message": "PR not found"}}
         )
+
+    return pr
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _encode_cursor(row) -> str:
+    return f'{(row.created_at - _EPOCH) // timedelta(microseconds=1)}_{row.id}'
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, pk = cursor.split('_')
+        return _EPOCH + timedelta(microseconds=int(created_at)), int(pk)
+    except (ValueError, OverflowError):
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail={"error": {"code": "INVALID_CURSOR", "message": "Malformed cursor"}}
+        )
+
+
+@pr_router.get(
+    '/search',
+    response_model=PullRequestSearchPageSchema,
+    status_code=HTTP_200_OK
+)
+async def pull_request_search(
+    request: Request,
+    q: Optional[str] = Query(None, min_length=3, max_length=100),
+    author_id: Optional[str] = Query(None),
+    status: Optional[PRStatus] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    include_archived: bool = Query(False),
+    after: Optional[str] = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    fields: Optional[str] = Query(None),
+    session: AsyncSession = Depends(get_session)
+):
+    rows = await PullRequestCrud.search(
+        session=session,
+        name=q,
+        author_id=author_id,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+        after=_decode_cursor(after) if after is not None else None,
+        limit=limit + 1,
+        include_archived=include_archived
+    )
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+
+    return render(request, PullRequestSearchPageSchema(pull_requests=rows[:limit], next_cursor=next_cursor), fields)
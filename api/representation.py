@@ -0,0 +1,82 @@
+from functools import lru_cache
+from typing import Optional, Tuple, Type, get_args, get_origin
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+from starlette.status import HTTP_400_BAD_REQUEST
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+MSGPACK_MEDIA_TYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def _nested_model(annotation) -> Optional[Tuple[Type[BaseModel], bool]]:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    for arg in get_args(annotation):
+        nested = _nested_model(arg)
+        if nested is not None:
+            return nested[0], nested[1] or get_origin(annotation) is list
+    return None
+
+
+def _include(model: Type[BaseModel], tree: dict) -> dict:
+    include = {}
+    for name, subtree in tree.items():
+        field = model.model_fields.get(name)
+        if field is None:
+            raise ValueError(name)
+        if subtree is True:
+            include[name] = True
+            continue
+
+        nested = _nested_model(field.annotation)
+        if nested is None:
+            raise ValueError(name)
+        nested_model, many = nested
+        nested_include = _include(nested_model, subtree)
+        include[name] = {'__all__': nested_include} if many else nested_include
+    return include
+
+
+@lru_cache(maxsize=256)
+def field_projection(model: Type[BaseModel], fields: str) -> dict:
+    tree = {}
+    for path in fields.split(','):
+        node = tree
+        *parents, leaf = path.strip().split('.')
+        for part in parents:
+            node = node.setdefault(part, {})
+            if node is True:
+                break
+        else:
+            node[leaf] = True
+    return _include(model, tree)
+
+
+def render(request: Request, model: BaseModel, fields: Optional[str] = None) -> Response:
+    include = None
+    if fields:
+        try:
+            include = field_projection(type(model), fields)
+        except ValueError as _e:
+            raise HTTPException(
+                status_code=HTTP_400_BAD_REQUEST,
+                detail={"error": {"code": "INVALID_FIELDS", "message": f"Unknown field: {_e}"}}
+            )
+
+    headers = {'Vary': 'Accept'}
+    accept = request.headers.get('accept', '')
+    if msgpack is not None and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        return Response(
+            msgpack.packb(model.model_dump(mode='json', include=include)),
+            media_type='application/msgpack',
+            headers=headers
+        )
+
+    return Response(model.model_dump_json(include=include), media_type='application/json', headers=headers)
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, List, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND, HTTP_503_SERVICE_UNAVAILABLE
+
+from config import REVIEW_EVENTS_HEARTBEAT, REVIEW_EVENTS_MAX_STREAMS, REVIEW_EVENTS_QUEUE_SIZE, \
+    REVIEW_EVENTS_REPLAY_LIMIT, REVIEW_EVENTS_REPLAY_CONCURRENCY
+from database.crud.review_event_crud import ReviewEventCrud
+from database.crud.user_crud import UserCrud
+from database.gen_session import SessionLocal
+from database.review_events import ReviewEventHub, EventCursor, RESYNC, CLOSED
+from middleware import metrics
+
+re_router = APIRouter(prefix='/users')
+logger = logging.getLogger(__name__)
+
+review_event_hub = ReviewEventHub(
+    queue_size=REVIEW_EVENTS_QUEUE_SIZE,
+    max_streams=REVIEW_EVENTS_MAX_STREAMS,
+    ping_interval=REVIEW_EVENTS_HEARTBEAT,
+    replay_concurrency=REVIEW_EVENTS_REPLAY_CONCURRENCY
+)
+metrics.gauge('review_event_streams', lambda: review_event_hub.streams)
+
+RECONNECT_DELAY_MS = 3000
+
+
+def _format_event(event: dict, cursor: EventCursor) -> str:
+    data = {key: value for key, value in event.items() if key != 'xid'}
+    return f'id: {cursor}\nevent: {event["kind"]}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+async def _replay(user_id: str, cursor: EventCursor) -> Tuple[List[dict], int, bool]:
+    async with review_event_hub.replays:
+        async with SessionLocal() as session:
+            # Taken before the events are read, so every transaction below it is visible to the next query
+            horizon = await ReviewEventCrud.get_horizon(session)
+            events = await ReviewEventCrud.get_since(
+                session, user_id, cursor.horizon, cursor.seen, REVIEW_EVENTS_REPLAY_LIMIT
+            )
+
+    complete = len(events) < REVIEW_EVENTS_REPLAY_LIMIT
+    if not complete:
+        # A truncated page is ordered by transaction, only the transactions before its last one are complete
+        horizon = min(horizon, events[-1]['xid'])
+    return [event for event in events if cursor.accept(event)], horizon, complete
+
+
+async def _event_stream(user_id: str, cursor: EventCursor) -> AsyncIterator[str]:
+    # Subscribed once the body is being sent: a response dropped before that never holds a stream slot
+    queue = review_event_hub.subscribe(user_id)
+    if queue is None:
+        # The cap filled up after the route checked it, the client comes back after the reconnect delay
+        yield f'retry: {RECONNECT_DELAY_MS}\n\n'
+        return
+
+    try:
+        yield f'retry: {RECONNECT_DELAY_MS}\n\n'
+
+        replay = True
+        replayed_at = retry_at = 0.0
+        while True:
+            if replay and time.monotonic() >= retry_at:
+                try:
+                    events, horizon, complete = await _replay(user_id, cursor)
+                except Exception as _e:
+                    logger.warning('Review event replay failed for %s, retrying: %s', user_id, _e)
+                    retry_at = time.monotonic() + RECONNECT_DELAY_MS / 1000
+                else:
+                    # The horizon moves only once the page is written, a client dropping mid-page resumes before it
+                    for event in events:
+                        yield _format_event(event, cursor)
+                    if cursor.advance(horizon):
+                        # An id without data moves the client's Last-Event-ID without dispatching an event
+                        yield f'id: {cursor}\n\n'
+                    replay = not complete
+                    replayed_at = time.monotonic()
+                    if replay:
+                        continue
+
+            timeout = REVIEW_EVENTS_HEARTBEAT if not replay else max(retry_at - time.monotonic(), 0.0)
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                event = None
+
+            if event is CLOSED:
+                return
+            if event is RESYNC:
+                replay = True
+            elif event is not None and not replay and cursor.accept(event):
+                # While a replay is pending, live events are left to it
+                yield _format_event(event, cursor)
+
+            # Delivered live events stay in the cursor until a replay moves the horizon past them
+            if cursor.seen and time.monotonic() - replayed_at >= REVIEW_EVENTS_HEARTBEAT:
+                replay = True
+    finally:
+        review_event_hub.unsubscribe(user_id, queue)
+
+
+@re_router.get('/reviewEvents')
+async def user_review_events(
+    user_id: str = Query(...),
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias='Last-Event-ID')
+):
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    try:
+        cursor = EventCursor.parse(resume_from) if resume_from is not None else None
+    except ValueError:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail={"error": {"code": "INVALID_CURSOR", "message": "Malformed Last-Event-ID"}}
+        )
+
+    async with SessionLocal() as session:
+        if not await UserCrud.get_row_by_id(session, user_id):
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail={"error": {"code": "NOT_FOUND", "message": "User not found"}}
+            )
+
+        if cursor is None:
+            # New streams start at the present: events already committed above the horizon count as seen
+            horizon = await ReviewEventCrud.get_horizon(session)
+            events = await ReviewEventCrud.get_since(session, user_id, horizon)
+            cursor = EventCursor(horizon, {event['id']: event['xid'] for event in events})
+
+    if review_event_hub.full:
+        raise HTTPException(
+            status_code=HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"error": {"code": "OVERLOADED", "message": "Too many event streams, retry later"}},
+            headers={'Retry-After': str(RECONNECT_DELAY_MS // 1000)}
+        )
+
+    return StreamingResponse(
+        _event_stream(user_id, cursor),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -35,6 +35,26 @@ class TeamResponseSchema(BaseModel):
     members: List[TeamMemberResponseSchema]
 
 
+class TeamMembersPageSchema(BaseModel):
+    team_name: str
+    members: List[TeamMemberResponseSchema]
+    next_cursor: Optional[str] = None
+
+
+class TeamSummarySchema(BaseModel):
+    team_name: str
+    active_members: int
+    inactive_members: int
+    open_reviews: int
+    members: List[TeamMemberResponseSchema]
+    members_next_cursor: Optional[str] = None
+
+
+class TeamSetIsActiveSchema(BaseModel):
+    team_name: str
+    is_active: bool
+
+
 # === Для users.py ===
 
 
@@ -52,6 +72,36 @@ class UserResponseSchema(BaseModel):
     is_active: bool
 
 
+class UserBulkSetIsActiveSchema(BaseModel):
+    user_ids: List[str] = Field(min_length=1)
+    is_active: bool
+
+
+class UserAvailabilitySchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    user_id: str
+    max_open_reviews: Optional[int] = Field(default=None, ge=0)
+    unavailable_until: Optional[datetime] = None
+
+
+class UserMoveSchema(BaseModel):
+    user_ids: List[str] = Field(min_length=1)
+    team_name: str
+    rebalance_reviews: bool = True
+
+
+class ReviewReassignmentSchema(BaseModel):
+    pull_request_id: str
+    old_user_id: str
+    replaced_by: Optional[str] = None
+
+
+class UserBulkSetIsActiveResponseSchema(BaseModel):
+    users: List[UserResponseSchema]
+    reassignments: List[ReviewReassignmentSchema]
+
+
 class PullRequestShortSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -101,6 +151,32 @@ class PullRequestMergeSchema(BaseModel):
     pull_request_id: str
 
 
+class PullRequestMergeBatchSchema(BaseModel):
+    pull_request_ids: List[str] = Field(min_length=1, max_length=1000)
+
+
+class PullRequestMergeBatchResponseSchema(BaseModel):
+    pull_requests: List[PullRequestResponseSchema]
+    not_found: List[str]
+
+
+class PullRequestInfoSchema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    pull_request_id: str
+    pull_request_name: str
+    author_id: str
+    status: PRStatus
+    created_at: datetime
+    merged_at: Optional[datetime] = None
+    assigned_reviewers: List[str]
+
+
+class PullRequestSearchPageSchema(BaseModel):
+    pull_requests: List[PullRequestInfoSchema]
+    next_cursor: Optional[str] = None
+
+
 class PullRequestReassignSchema(BaseModel):
     pull_request_id: str
     old_user_id: str
@@ -109,3 +185,19 @@ class PullRequestReassignSchema(BaseModel):
 class PullRequestReassignResponseSchema(BaseModel):
     pr: PullRequestResponseSchema
     replaced_by: str
+
+
+# === Для health.py ===
+
+
+class HealthLiveSchema(BaseModel):
+    status: str
+
+
+class HealthReadySchema(BaseModel):
+    status: str
+    warmed_up: bool
+    draining: bool
+    db_ok: bool
+    db_checked_ago: Optional[float] = None
+    in_flight: int
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, HTTPException
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.params import Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR, HTTP_201_CREATED, HTTP_400_BAD_REQUEST, HTTP_200_OK, \
     HTTP_404_NOT_FOUND
 
-from api.schemas import TeamResponseSchema, TeamCreateSchema
+from api.representation import render
+from api.schemas import TeamResponseSchema, TeamCreateSchema, TeamSetIsActiveSchema, \
+    UserBulkSetIsActiveResponseSchema, TeamSummarySchema, TeamMembersPageSchema
+from config import TEAM_SUMMARY_MEMBERS_LIMIT, FALLBACK_TEAMS, ASSIGNMENT_LOCKS
+from database.crud.pull_request_crud import PullRequestCrud
 from database.crud.team_crud import TeamCrud
 from database.crud.user_crud import UserCrud
 from database.gen_session import get_session
+from telemetry import current_request_id
 
 
 t_router = APIRouter(prefix='/team')
+logger = logging.getLogger(__name__)
 
 
 @t_router.post(
@@ -38,40 +47,135 @@ async def team_add(
                 user_id=user.user_id,
                 username=user.username,
                 is_active=user.is_active,
-                team_name=new_team.team_name
+                team_pk=new_team.id
             )
 
         await session.commit()
-        await session.refresh(new_team)
 
-        return new_team
+        return TeamResponseSchema(
+            team_name=new_team.team_name,
+            members=await UserCrud.get_many(session, [user.user_id for user in team_data.members])
+        )
 
     except HTTPException as _he:
         await session.rollback()
         raise _he
-    except Exception as _e:
+    except Exception:
+        logger.exception('Unexpected error')
         await session.rollback()
         raise HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "INTERNAL_ERROR", "message": f"Unexpected error: {_e}"}}
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
         )
 
 
+async def _members_page(session: AsyncSession, team_name: str, after: Optional[str], limit: int):
+    members = await TeamCrud.get_members(session, team_name, after, limit + 1)
+    next_cursor = members[limit - 1].user_id if len(members) > limit else None
+    return members[:limit], next_cursor
+
+
 @t_router.get(
     '/get',
-    response_model=TeamResponseSchema,
+    response_model=TeamSummarySchema,
     status_code=HTTP_200_OK
 )
 async def team_get(
+    request: Request,
     team_name: str = Query(...),
+    fields: Optional[str] = Query(None),
     session: AsyncSession = Depends(get_session)
 ):
-    team = await TeamCrud.get_by_name(session, team_name)
+    summary = await TeamCrud.get_summary(session, team_name)
 
-    if not team:
+    if not summary:
         raise HTTPException(
             status_code=HTTP_404_NOT_FOUND,
             detail={"code": "NOT_FOUND", "message": "Team not found"}
         )
 
-    return team
+    members, next_cursor = await _members_page(session, team_name, None, TEAM_SUMMARY_MEMBERS_LIMIT)
+
+    return render(request, TeamSummarySchema(
+        team_name=summary.team_name,
+        active_members=summary.active_members,
+        inactive_members=summary.inactive_members,
+        open_reviews=summary.open_reviews,
+        members=members,
+        members_next_cursor=next_cursor
+    ), fields)
+
+
+@t_router.get(
+    '/members',
+    response_model=TeamMembersPageSchema,
+    status_code=HTTP_200_OK
+)
+async def team_members(
+    request: Request,
+    team_name: str = Query(...),
+    after: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None),
+    session: AsyncSession = Depends(get_session)
+):
+    members, next_cursor = await _members_page(session, team_name, after, limit)
+
+    if not members and not await TeamCrud.get_by_name(session, team_name):
+        raise HTTPException(
+            status_code=HTTP_404_NOT_FOUND,
+            detail={"error": {"code": "NOT_FOUND", "message": "Team not found"}}
+        )
+
+    return render(request, TeamMembersPageSchema(team_name=team_name, members=members, next_cursor=next_cursor), fields)
+
+
+@t_router.post(
+    '/setIsActive',
+    response_model=UserBulkSetIsActiveResponseSchema,
+    status_code=HTTP_200_OK
+)
+async def team_set_is_active(
+        team_data: TeamSetIsActiveSchema,
+        session: AsyncSession = Depends(get_session)
+):
+    try:
+        user_ids = await UserCrud.get_team_member_ids(session, team_data.team_name)
+
+        if not user_ids and not await TeamCrud.get_by_name(session, team_data.team_name):
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail={"error": {"code": "NOT_FOUND", "message": "Team not found"}}
+            )
+
+        changed = await UserCrud.bulk_set_is_active(session, user_ids, team_data.is_active)
+
+        reassignments = []
+        if changed and not team_data.is_active:
+            reassignments = await PullRequestCrud.redistribute_reviews(
+                session, changed, fallback_teams=FALLBACK_TEAMS, lock_teams=ASSIGNMENT_LOCKS
+            )
+
+        await session.commit()
+
+        return UserBulkSetIsActiveResponseSchema(
+            users=await UserCrud.get_many(session, user_ids),
+            reassignments=reassignments
+        )
+
+    except HTTPException as _he:
+        await session.rollback()
+        raise _he
+    except Exception:
+        logger.exception('Unexpected error')
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
+        )
@@ -1,15 +1,22 @@
-from random import choice
+import logging
+from typing import Optional
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.status import HTTP_200_OK, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
 
-from api.schemas import UserResponseSchema, UserSetIsActiveSchema, UserReviewListSchema
+from api.representation import render
+from api.schemas import UserResponseSchema, UserSetIsActiveSchema, UserReviewListSchema, \
+    UserBulkSetIsActiveSchema, UserBulkSetIsActiveResponseSchema, UserMoveSchema, UserAvailabilitySchema
+from config import FALLBACK_TEAMS, ASSIGNMENT_LOCKS
+from database.crud.pull_request_crud import PullRequestCrud
+from database.crud.team_crud import TeamCrud
 from database.crud.user_crud import UserCrud
 from database.gen_session import get_session
-from database.models import PRStatus, PullRequestReviewer
+from telemetry import current_request_id
 
 u_router = APIRouter(prefix='/users')
+logger = logging.getLogger(__name__)
 
 
 @u_router.post(
@@ -22,7 +29,7 @@ async def user_set_is_active(
         session: AsyncSession = Depends(get_session)
 ):
     try:
-        user = await UserCrud.get_by_id(session, user_data.user_id)
+        user = await UserCrud.get_row_by_id(session, user_data.user_id)
 
         if not user:
             raise HTTPException(
@@ -33,62 +40,175 @@ async def user_set_is_active(
         if user.is_active == user_data.is_active:
             return user
 
-        if user_data.is_active:
-            user.is_active = True
-            await session.commit()
-            await session.refresh(user)
-            return user
+        changed = await UserCrud.bulk_set_is_active(session, [user.user_id], user_data.is_active)
+        if not user_data.is_active:
+            await PullRequestCrud.redistribute_reviews(
+                session, changed, fallback_teams=FALLBACK_TEAMS, lock_teams=ASSIGNMENT_LOCKS
+            )
+
+        await session.commit()
+
+        return await UserCrud.get_row_by_id(session, user.user_id)
+
+    except HTTPException as _he:
+        await session.rollback()
+        raise _he
+    except Exception:
+        logger.exception('Unexpected error')
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
+        )
+
+
+@u_router.post(
+    '/bulkSetIsActive',
+    response_model=UserBulkSetIsActiveResponseSchema,
+    status_code=HTTP_200_OK
+)
+async def user_bulk_set_is_active(
+        users_data: UserBulkSetIsActiveSchema,
+        session: AsyncSession = Depends(get_session)
+):
+    try:
+        user_ids = list(dict.fromkeys(users_data.user_ids))
+        users = await UserCrud.get_many(session, user_ids)
+
+        missing_ids = set(user_ids) - {user.user_id for user in users}
+        if missing_ids:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail={"error": {"code": "NOT_FOUND", "message": f"Users not found: {sorted(missing_ids)}"}}
+            )
+
+        changed = await UserCrud.bulk_set_is_active(session, user_ids, users_data.is_active)
+
+        reassignments = []
+        if changed and not users_data.is_active:
+            reassignments = await PullRequestCrud.redistribute_reviews(
+                session, changed, fallback_teams=FALLBACK_TEAMS, lock_teams=ASSIGNMENT_LOCKS
+            )
+
+        await session.commit()
+
+        return UserBulkSetIsActiveResponseSchema(
+            users=await UserCrud.get_many(session, user_ids),
+            reassignments=reassignments
+        )
+
+    except HTTPException as _he:
+        await session.rollback()
+        raise _he
+    except Exception:
+        logger.exception('Unexpected error')
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
+        )
 
-        open_prs_to_reassign = [
-            assoc.pull_request for assoc in user.reviewer_associations
-            if assoc.pull_request.status == PRStatus.OPEN
-        ]
 
-        user.is_active = False
+@u_router.post(
+    '/moveToTeam',
+    response_model=UserBulkSetIsActiveResponseSchema,
+    status_code=HTTP_200_OK
+)
+async def user_move_to_team(
+        move_data: UserMoveSchema,
+        session: AsyncSession = Depends(get_session)
+):
+    try:
+        if not await TeamCrud.get_by_name(session, move_data.team_name):
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail={"error": {"code": "NOT_FOUND", "message": "Team not found"}}
+            )
+
+        user_ids = list(dict.fromkeys(move_data.user_ids))
+        users = await UserCrud.get_many(session, user_ids)
 
-        for pr in open_prs_to_reassign:
-            exclude_ids = [pr.author_id]
-            pr_reviewers = await pr.awaitable_attrs.reviewer_associations
-            exclude_ids.extend([
-                assoc.user_id for assoc in pr_reviewers
-            ])
+        missing_ids = set(user_ids) - {user.user_id for user in users}
+        if missing_ids:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail={"error": {"code": "NOT_FOUND", "message": f"Users not found: {sorted(missing_ids)}"}}
+            )
 
-            candidates = await UserCrud.get_active_candidates(
-                session=session,
-                team_name=user.team_name,
-                exclude_ids=exclude_ids
+        moved = await UserCrud.move_to_team(session, user_ids, move_data.team_name)
+
+        reassignments = []
+        if moved and move_data.rebalance_reviews:
+            reassignments = await PullRequestCrud.redistribute_reviews(
+                session, moved, fallback_teams=FALLBACK_TEAMS, lock_teams=ASSIGNMENT_LOCKS
             )
 
-            old_association = next(
-                (assoc for assoc in pr_reviewers if assoc.user_id == user.user_id),
-                None
+        await session.commit()
+
+        return UserBulkSetIsActiveResponseSchema(
+            users=await UserCrud.get_many(session, user_ids),
+            reassignments=reassignments
+        )
+
+    except HTTPException as _he:
+        await session.rollback()
+        raise _he
+    except Exception:
+        logger.exception('Unexpected error')
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
+        )
+
+
+@u_router.post(
+    '/setAvailability',
+    response_model=UserAvailabilitySchema,
+    status_code=HTTP_200_OK
+)
+async def user_set_availability(
+        availability: UserAvailabilitySchema,
+        session: AsyncSession = Depends(get_session)
+):
+    try:
+        user = await UserCrud.set_availability(
+            session,
+            user_id=availability.user_id,
+            values=availability.model_dump(include=availability.model_fields_set - {'user_id'})
+        )
+
+        if not user:
+            raise HTTPException(
+                status_code=HTTP_404_NOT_FOUND,
+                detail={"error": {"code": "NOT_FOUND", "message": "User not found"}}
             )
-            if old_association:
-                await session.delete(old_association)
-                await session.flush()
-
-            if candidates:
-                new_reviewer = choice(candidates)
-                new_association = PullRequestReviewer(
-                    user_id=new_reviewer.user_id,
-                    pull_request_id=pr.pull_request_id
-                )
-                session.add(new_association)
-                await session.flush()
 
         await session.commit()
-        await session.refresh(user)
 
         return user
 
     except HTTPException as _he:
         await session.rollback()
         raise _he
-    except Exception as _e:
+    except Exception:
+        logger.exception('Unexpected error')
         await session.rollback()
         raise HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "INTERNAL_ERROR", "message": f"Unexpected error: {_e}"}}
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
         )
 
 
@@ -98,11 +218,14 @@ async def user_set_is_active(
     status_code=HTTP_200_OK
 )
 async def user_get_review(
+    request: Request,
     user_id: str = Query(...),
+    include_archived: bool = Query(False),
+    fields: Optional[str] = Query(None),
     session: AsyncSession = Depends(get_session)
 ):
     try:
-        user = await UserCrud.get_by_id(session, user_id)
+        user = await UserCrud.get_row_by_id(session, user_id)
 
         if not user:
             raise HTTPException(
@@ -110,17 +233,21 @@ async def user_get_review(
                 detail={"error": {"code": "NOT_FOUND", "message": "User not found"}}
             )
 
-        return UserReviewListSchema(
+        return render(request, UserReviewListSchema(
             user_id=user.user_id,
-            pull_requests=user.assigned_reviews
-        )
+            pull_requests=await PullRequestCrud.get_reviews_by_user(session, user_id, include_archived)
+        ), fields)
 
     except HTTPException as _he:
         await session.rollback()
         raise _he
-    except Exception as _e:
+    except Exception:
+        logger.exception('Unexpected error')
         await session.rollback()
         raise HTTPException(
             status_code=HTTP_500_INTERNAL_SERVER_ERROR,
-            detail={"error": {"code": "INTERNAL_ERROR", "message": f"Unexpected error: {_e}"}}
+            detail={"error": {
+                "code": "INTERNAL_ERROR",
+                "message": f"Internal server error (request_id: {current_request_id()})"
+            }}
         )
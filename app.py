@@ -1,13 +1,168 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+import signal
+import threading
+from contextlib import asynccontextmanager, suppress
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from config import API_PORT
+from sqlalchemy.orm import configure_mappers
+
+from config import API_PORT, DB_POOL_WARMUP, HEALTH_DB_PING_INTERVAL, SHUTDOWN_READINESS_DELAY, \
+    SHUTDOWN_DRAIN_TIMEOUT, REQUEST_TIMEOUT, ROUTE_TIMEOUTS, MAX_IN_FLIGHT, SHED_RETRY_AFTER, RATE_LIMITS, \
+    RATE_LIMIT_BACKEND, RATE_LIMIT_CLIENT_HEADER, LOG_LEVEL, ACCESS_LOG_SAMPLE_RATE, SLOW_REQUEST_MS, SLOW_QUERY_MS, \
+    SLOW_QUERY_SAMPLE_RATE, PROFILING_ENABLED, PROFILE_HEADER, PROFILE_TOKEN, PROFILE_SAMPLE_RATE, PROFILE_INTERVAL, \
+    COMPRESSION_ENABLED, COMPRESSION_MINIMUM_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
 from api import routers
+from api.health import health_state, ping_database
+from api.profiling import profile_store
+from api.review_events import review_event_hub
+from database.crud.pull_request_crud import PullRequestCrud
+from database.crud.user_crud import UserCrud
+from database.gen_session import engine, warm_up
+from middleware import InFlightMiddleware, in_flight, DeadlineMiddleware, LoadSheddingMiddleware, \
+    RateLimitMiddleware, MemoryTokenBuckets, PostgresTokenBuckets, RequestContextMiddleware, ProfilingMiddleware, \
+    CompressionMiddleware
+from telemetry import setup_logging, install_query_logging
+
+_import_finished = time.perf_counter()
+
+setup_logging(LOG_LEVEL)
+install_query_logging(engine, SLOW_QUERY_MS, SLOW_QUERY_SAMPLE_RATE)
+
+logger = logging.getLogger('uvicorn.error')
+
+
+def _drain_on_exit(loop: asyncio.AbstractEventLoop) -> None:
+    # uvicorn closes the listeners and waits for every connection before the lifespan shutdown runs, so draining
+    # starts from the signal: readiness reports 503 while requests are still served, open event streams are closed
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    exiting = False
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        handle_exit = signal.getsignal(sig)
+        if not callable(handle_exit):
+            continue
+
+        def exit_server(signum, frame, handle_exit=handle_exit):
+            nonlocal exiting
+            if not exiting:
+                exiting = True
+                handle_exit(signum, frame)
+
+        def handler(signum, frame, handle_exit=handle_exit, exit_server=exit_server):
+            if exiting:
+                # A repeated signal after shutdown started keeps uvicorn's meaning: exit without waiting
+                handle_exit(signum, frame)
+                return
+
+            review_event_hub.close_streams_soon()
+            if signum == signal.SIGTERM and not health_state.draining and SHUTDOWN_READINESS_DELAY > 0:
+                health_state.draining = True
+                logger.info('Draining: readiness reports 503 for %.1fs before shutdown', SHUTDOWN_READINESS_DELAY)
+                loop.call_soon_threadsafe(loop.call_later, SHUTDOWN_READINESS_DELAY, exit_server, signum, frame)
+                return
+
+            health_state.draining = True
+            exit_server(signum, frame)
+
+        signal.signal(sig, handler)
+
 
+WARMUP_STATEMENTS = [
+    lambda session: UserCrud.get_row_by_id(session, ''),
+    lambda session: UserCrud.get_active_candidates(session, '', ['']),
+    lambda session: PullRequestCrud.exists(session, ''),
+    lambda session: PullRequestCrud.get_reviewers_many(session, ['']),
+    lambda session: PullRequestCrud.get_reviews_by_user(session, ''),
+]
 
-app = FastAPI()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    timings = {'imports': _import_finished - _import_started}
 
+    started = time.perf_counter()
+    configure_mappers()
+    timings['mappers'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        await warm_up(DB_POOL_WARMUP, WARMUP_STATEMENTS)
+        health_state.warmed_up = True
+        health_state.record_ping()
+    except Exception as _e:
+        health_state.record_ping(_e)
+    timings['pool_warmup'] = time.perf_counter() - started
+
+    app.state.startup_timings = timings
+    logger.info(
+        'Startup finished in %.3fs (%s)',
+        sum(timings.values()),
+        ', '.join(f'{phase}={seconds:.3f}s' for phase, seconds in timings.items())
+    )
+
+    ping_task = asyncio.create_task(
+        ping_database(HEALTH_DB_PING_INTERVAL, lambda: warm_up(DB_POOL_WARMUP, WARMUP_STATEMENTS))
+    )
+
+    _drain_on_exit(asyncio.get_running_loop())
+
+    yield
+
+    health_state.draining = True
+    await review_event_hub.close()
+
+    ping_task.cancel()
+    with suppress(asyncio.CancelledError):
+        await ping_task
+
+    await engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+if PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=profile_store,
+        header=PROFILE_HEADER,
+        token=PROFILE_TOKEN,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        interval=PROFILE_INTERVAL
+    )
+app.add_middleware(DeadlineMiddleware, default_timeout=REQUEST_TIMEOUT, route_timeouts=ROUTE_TIMEOUTS)
+# Added first runs innermost: shed requests never open a connection for the Postgres bucket
+app.add_middleware(
+    RateLimitMiddleware,
+    limits=RATE_LIMITS,
+    backend=PostgresTokenBuckets(engine) if RATE_LIMIT_BACKEND == 'postgres' else MemoryTokenBuckets(),
+    client_header=RATE_LIMIT_CLIENT_HEADER
+)
+app.add_middleware(
+    LoadSheddingMiddleware,
+    max_in_flight=MAX_IN_FLIGHT,
+    retry_after=SHED_RETRY_AFTER,
+    exempt_prefixes=('/health', '/users/reviewEvents')
+)
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MINIMUM_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY
+    )
+app.add_middleware(InFlightMiddleware, tracker=in_flight)
+app.add_middleware(RequestContextMiddleware, sample_rate=ACCESS_LOG_SAMPLE_RATE, slow_request_ms=SLOW_REQUEST_MS)
+# Outermost, so 429, 503 and 504 responses of the inner middleware carry CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=['*'],
@@ -25,7 +180,7 @@ app.add_middleware(
         "Access-Control-Allow-Headers",
         "Access-Control-Allow-Origin",
         "Authorization"],
-    expose_headers=["Content-Disposition", "Content-Type"]
+    expose_headers=["Content-Disposition", "Content-Type", "Retry-After"]
 )
 
 
@@ -34,4 +189,4 @@ for rt in routers:
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=API_PORT)
+    uvicorn.run(app, host="0.0.0.0", port=API_PORT, timeout_graceful_shutdown=SHUTDOWN_DRAIN_TIMEOUT)
@@ -0,0 +1,4 @@
+from .engine import *
+
+__all__ = ['ACTIVE', 'FALLBACK', 'Candidate', 'review_weight', 'weighted_sample', 'weighted_sample_by_keys',
+           'select_reviewers', 'select_replacement', 'fallback_chain']
@@ -0,0 +1,97 @@
+import math
+from random import choices, random
+from typing import Optional, List, Dict, Sequence, Callable, Iterable
+
+
+ACTIVE = 1
+FALLBACK = 2
+
+
+class Candidate:
+    __slots__ = ('user_id', 'open_count', 'flags', 'max_open')
+
+    def __init__(self, user_id: str, open_count: int = 0, flags: int = ACTIVE, max_open: Optional[int] = None):
+        self.user_id = user_id
+        self.open_count = open_count
+        self.flags = flags
+        self.max_open = max_open
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.max_open is None or self.open_count < self.max_open
+
+    def __repr__(self) -> str:
+        return (f'Candidate({self.user_id!r}, open_count={self.open_count}, flags={self.flags}, '
+                f'max_open={self.max_open})')
+
+
+def review_weight(open_count: int) -> float:
+    return 1 / (1 + open_count)
+
+
+def weighted_sample(
+        open_counts: Sequence[int],
+        k: int = 2,
+        weight: Optional[Callable[[int], float]] = None
+) -> List[int]:
+    indices = list(range(len(open_counts)))
+    if len(indices) <= k:
+        return indices
+
+    weight = weight or review_weight
+    weights_pool = [weight(open_count) for open_count in open_counts]
+
+    selected = []
+    for _ in range(k):
+        pos = choices(range(len(indices)), weights=weights_pool, k=1)[0]
+        selected.append(indices.pop(pos))
+        weights_pool.pop(pos)
+
+    return selected
+
+
+def weighted_sample_by_keys(
+        open_counts: Sequence[int],
+        k: int = 2
+) -> List[int]:
+    keys = [-math.log(1 - random()) * (1 + open_count) for open_count in open_counts]
+    return sorted(range(len(open_counts)), key=keys.__getitem__)[:k]
+
+
+def select_reviewers(
+        candidates: Sequence[Candidate],
+        k: int = 2,
+        weight: Optional[Callable[[int], float]] = None
+) -> List[Candidate]:
+    pool = [candidate for candidate in candidates if candidate.flags & ACTIVE and candidate.has_capacity]
+
+    return [
+        pool[idx]
+        for idx in weighted_sample([candidate.open_count for candidate in pool], k=k, weight=weight)
+    ]
+
+
+def select_replacement(
+        candidates: Iterable[Candidate],
+        exclude_ids: Iterable[str] = ()
+) -> Optional[Candidate]:
+    exclude_ids = set(exclude_ids)
+    pool = [
+        candidate for candidate in candidates
+        if candidate.flags & ACTIVE and candidate.has_capacity and candidate.user_id not in exclude_ids
+    ]
+    if not pool:
+        return None
+
+    return min(
+        pool,
+        key=lambda candidate: (bool(candidate.flags & FALLBACK), candidate.open_count, candidate.user_id)
+    )
+
+
+def fallback_chain(team_name: str, fallback_teams: Optional[Dict[str, List[str]]] = None) -> List[str]:
+    fallback_teams = fallback_teams or {}
+    return [
+        fallback for fallback in dict.fromkeys(fallback_teams.get(team_name, fallback_teams.get('*', ())))
+        if fallback != team_name
+    ]
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from statistics import mean, pvariance
+
+import httpx
+
+
+async def run_once(app, operation, creates, reviewers, concurrency):
+    team_name = f'__bench_creates_{uuid.uuid4().hex[:8]}'
+    author_id = f'{team_name}_author'
+    reviewer_ids = [f'{team_name}_u{idx}' for idx in range(reviewers)]
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=60) as client:
+        response = await client.post('/team/add', json={
+            'team_name': team_name,
+            'members': [
+                {'user_id': user_id, 'username': user_id, 'is_active': True}
+                for user_id in [author_id, *reviewer_ids]
+            ]
+        })
+        response.raise_for_status()
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create(idx):
+            async with semaphore:
+                response = await client.post('/pullRequest/create', json={
+                    'pull_request_id': f'{team_name}_pr{idx}',
+                    'pull_request_name': 'bench',
+                    'author_id': author_id
+                })
+                response.raise_for_status()
+                return response.json()['assigned_reviewers']
+
+        async def reassign(idx, old_user_id):
+            async with semaphore:
+                response = await client.post('/pullRequest/reassign', json={
+                    'pull_request_id': f'{team_name}_pr{idx}',
+                    'old_user_id': old_user_id
+                })
+                response.raise_for_status()
+                return old_user_id, response.json()['replaced_by']
+
+        loads = {user_id: 0 for user_id in reviewer_ids}
+
+        if operation == 'create':
+            started = time.perf_counter()
+            assignments = await asyncio.gather(*(create(idx) for idx in range(creates)))
+            elapsed = time.perf_counter() - started
+        else:
+            assignments = [await create(idx) for idx in range(creates)]
+            started = time.perf_counter()
+            replacements = await asyncio.gather(*(
+                reassign(idx, assigned[0]) for idx, assigned in enumerate(assignments) if assigned
+            ))
+            elapsed = time.perf_counter() - started
+
+            for old_user_id, new_user_id in replacements:
+                loads[old_user_id] -= 1
+                loads[new_user_id] += 1
+
+    for assigned in assignments:
+        for user_id in assigned:
+            loads[user_id] += 1
+
+    return list(loads.values()), elapsed
+
+
+async def run(operation, creates, reviewers, concurrency, repeat):
+    from app import app
+
+    variances, spreads, timings = [], [], []
+    async with app.router.lifespan_context(app):
+        for _ in range(repeat):
+            loads, elapsed = await run_once(app, operation, creates, reviewers, concurrency)
+            variances.append(pvariance(loads))
+            spreads.append(max(loads) - min(loads))
+            timings.append(elapsed)
+
+    print(f'operation={operation} locks={os.environ["ASSIGNMENT_LOCKS"]} creates={creates} reviewers={reviewers} '
+          f'concurrency={concurrency} repeat={repeat}')
+    print(f'load variance mean={mean(variances):.2f} max-min spread mean={mean(spreads):.1f} '
+          f'throughput={creates / mean(timings):.0f} requests/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reviewer load balance under concurrent assignments in one team')
+    parser.add_argument('--operation', choices=['create', 'reassign'], default='create')
+    parser.add_argument('--creates', type=int, default=200)
+    parser.add_argument('--reviewers', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--locks', choices=['on', 'off'], default='on')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ['ASSIGNMENT_LOCKS'] = 'true' if args.locks == 'on' else 'false'
+    os.environ['RATE_LIMITS'] = ''
+    os.environ['MAX_IN_FLIGHT'] = str(args.concurrency * 2)
+    os.environ['ROUTE_TIMEOUTS'] = ''
+    os.environ['REQUEST_TIMEOUT'] = '60'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    asyncio.run(run(args.operation, args.creates, args.reviewers, args.concurrency, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import insert
+
+from database.crud.pull_request_crud import PullRequestCrud
+from database.crud.user_crud import UserCrud
+from database.gen_session import SessionLocal, engine
+from database.models import Team, User, PullRequest, PullRequestReviewer
+
+
+TEAM_NAME = '__bench_crud_overhead'
+AUTHOR_ID = f'{TEAM_NAME}_author'
+REVIEWER_IDS = [f'{TEAM_NAME}_u{idx}' for idx in range(8)]
+PR_ID = f'{TEAM_NAME}_pr'
+
+CALLS = {
+    'UserCrud.get_row_by_id': lambda session: UserCrud.get_row_by_id(session, AUTHOR_ID),
+    'UserCrud.get_active_candidates': lambda session: UserCrud.get_active_candidates(session, TEAM_NAME, [AUTHOR_ID]),
+    'PullRequestCrud.exists': lambda session: PullRequestCrud.exists(session, PR_ID),
+    'PullRequestCrud.get_row_by_id': lambda session: PullRequestCrud.get_row_by_id(session, PR_ID),
+    'PullRequestCrud.get_reviewers_many': lambda session: PullRequestCrud.get_reviewers_many(session, [PR_ID]),
+    'PullRequestCrud.get_reviews_by_user': lambda session: PullRequestCrud.get_reviews_by_user(
+        session, REVIEWER_IDS[0]
+    ),
+}
+
+
+async def seed(session):
+    team_pk = (await session.execute(insert(Team).values(team_name=TEAM_NAME).returning(Team.id))).scalar_one()
+    users = await session.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [
+            {'user_id': user_id, 'username': user_id, 'is_active': True, 'team_pk': team_pk}
+            for user_id in [AUTHOR_ID, *REVIEWER_IDS]
+        ]
+    )
+    author_pk, *user_pks = users.scalars().all()
+
+    pr_pk = (await session.execute(
+        insert(PullRequest)
+        .values(pull_request_id=PR_ID, pull_request_name=PR_ID, author_pk=author_pk)
+        .returning(PullRequest.id)
+    )).scalar_one()
+    await session.execute(insert(PullRequestReviewer), [
+        {'user_pk': user_pk, 'pull_request_pk': pr_pk} for user_pk in user_pks[:2]
+    ])
+
+
+async def measure(session, call, calls: int):
+    for _ in range(min(calls, 100)):
+        await call(session)
+
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for _ in range(calls):
+        await call(session)
+    return (time.perf_counter() - started) / calls, (time.process_time() - cpu_started) / calls
+
+
+async def main(calls: int):
+    try:
+        async with SessionLocal() as session:
+            await seed(session)
+
+            print(f'{"call":<36} {"wall us":>9} {"cpu us":>9}')
+            for name, call in CALLS.items():
+                wall, cpu = await measure(session, call, calls)
+                print(f'{name:<36} {wall * 1e6:9.1f} {cpu * 1e6:9.1f}')
+
+            await session.rollback()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Measure per-call latency and client-side CPU time (statement construction, SQL compilation '
+                    'and cache lookup, result processing) of the hot CRUD queries'
+    )
+    parser.add_argument('--calls', type=int, default=5000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.calls))
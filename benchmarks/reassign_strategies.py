@@ -0,0 +1,176 @@
+import argparse
+import random
+from statistics import pvariance, mean
+
+from assignment import Candidate, review_weight, weighted_sample, select_replacement
+
+
+EVENT_KINDS = ['create', 'merge', 'reassign', 'deactivate', 'activate']
+EVENT_WEIGHTS = [40, 40, 12, 4, 4]
+
+
+def strategy_random(rng, candidate_loads):
+    return rng.choice(sorted(candidate_loads)) if candidate_loads else None
+
+
+def strategy_weighted(rng, candidate_loads):
+    if not candidate_loads:
+        return None
+    user_ids = sorted(candidate_loads)
+    weights = [review_weight(candidate_loads[user_id]) for user_id in user_ids]
+    return rng.choices(user_ids, weights=weights, k=1)[0]
+
+
+def strategy_least_loaded(rng, candidate_loads):
+    replacement = select_replacement(
+        Candidate(user_id, open_count) for user_id, open_count in candidate_loads.items()
+    )
+    return replacement.user_id if replacement else None
+
+
+STRATEGIES = {
+    'random': strategy_random,
+    'weighted': strategy_weighted,
+    'least_loaded': strategy_least_loaded,
+}
+
+
+def generate_events(seed, count):
+    rng = random.Random(seed)
+    kinds = rng.choices(EVENT_KINDS, weights=EVENT_WEIGHTS, k=count)
+    return [(kind, rng.random(), rng.random()) for kind in kinds]
+
+
+class Simulation:
+    def __init__(self, teams, team_size, strategy, seed):
+        self.rng = random.Random(seed)
+        self.strategy = strategy
+        self.team_of = {}
+        self.active = {}
+        self.load = {}
+        for t in range(teams):
+            for u in range(team_size):
+                user_id = f't{t}_u{u}'
+                self.team_of[user_id] = t
+                self.active[user_id] = True
+                self.load[user_id] = 0
+        self.users = sorted(self.team_of)
+        self.open_prs = {}
+        self.next_pr = 0
+        self.reassignments = 0
+        self.dropped = 0
+
+    def candidate_loads(self, team, exclude):
+        return {
+            user_id: self.load[user_id] for user_id in self.users
+            if self.team_of[user_id] == team and self.active[user_id] and user_id not in exclude
+        }
+
+    def create(self, a):
+        authors = [user_id for user_id in self.users if self.active[user_id]]
+        if not authors:
+            return
+        author = authors[int(a * len(authors))]
+        pool = self.candidate_loads(self.team_of[author], {author})
+        user_ids = sorted(pool)
+        reviewers = [user_ids[idx] for idx in weighted_sample([pool[user_id] for user_id in user_ids])]
+        for user_id in reviewers:
+            self.load[user_id] += 1
+        self.open_prs[self.next_pr] = (author, reviewers)
+        self.next_pr += 1
+
+    def merge(self, a):
+        if not self.open_prs:
+            return
+        pr_id = sorted(self.open_prs)[int(a * len(self.open_prs))]
+        _, reviewers = self.open_prs.pop(pr_id)
+        for user_id in reviewers:
+            self.load[user_id] -= 1
+
+    def replace(self, pr_id, old_user_id):
+        author, reviewers = self.open_prs[pr_id]
+        reviewers.remove(old_user_id)
+        self.load[old_user_id] -= 1
+        pool = self.candidate_loads(self.team_of[old_user_id], {author, old_user_id, *reviewers})
+        new_user_id = self.strategy(self.rng, pool)
+        if new_user_id is None:
+            self.dropped += 1
+            return
+        reviewers.append(new_user_id)
+        self.load[new_user_id] += 1
+        self.reassignments += 1
+
+    def reassign(self, a, b):
+        with_reviewers = [pr_id for pr_id in sorted(self.open_prs) if self.open_prs[pr_id][1]]
+        if not with_reviewers:
+            return
+        pr_id = with_reviewers[int(a * len(with_reviewers))]
+        reviewers = self.open_prs[pr_id][1]
+        self.replace(pr_id, reviewers[int(b * len(reviewers))])
+
+    def deactivate(self, a):
+        active = [user_id for user_id in self.users if self.active[user_id]]
+        if len(active) <= 1:
+            return
+        user_id = active[int(a * len(active))]
+        self.active[user_id] = False
+        for pr_id in sorted(self.open_prs):
+            if user_id in self.open_prs[pr_id][1]:
+                self.replace(pr_id, user_id)
+
+    def activate(self, a):
+        inactive = [user_id for user_id in self.users if not self.active[user_id]]
+        if inactive:
+            self.active[inactive[int(a * len(inactive))]] = True
+
+    def apply(self, kind, a, b):
+        if kind == 'reassign':
+            self.reassign(a, b)
+        else:
+            getattr(self, kind)(a)
+
+    def load_variance(self):
+        return pvariance([self.load[user_id] for user_id in self.users if self.active[user_id]])
+
+
+def run(strategy_name, events, teams, team_size, seed, sample_every):
+    random.seed(seed)
+    sim = Simulation(teams, team_size, STRATEGIES[strategy_name], seed)
+    samples = []
+    for i, (kind, a, b) in enumerate(events, start=1):
+        sim.apply(kind, a, b)
+        if i % sample_every == 0:
+            samples.append(sim.load_variance())
+
+    return {
+        'strategy': strategy_name,
+        'mean_variance': mean(samples) if samples else 0.0,
+        'final_variance': sim.load_variance(),
+        'max_load': max(sim.load.values()),
+        'reassignments': sim.reassignments,
+        'dropped': sim.dropped,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a synthetic event stream and compare reassign strategies')
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--teams', type=int, default=5)
+    parser.add_argument('--team-size', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sample-every', type=int, default=100)
+    args = parser.parse_args()
+
+    events = generate_events(args.seed, args.events)
+
+    print(f"{'strategy':<14}{'mean var':>10}{'final var':>11}{'max load':>10}{'reassigned':>12}{'dropped':>9}")
+    for strategy_name in STRATEGIES:
+        r = run(strategy_name, events, args.teams, args.team_size, args.seed, args.sample_every)
+        print(
+            f"{r['strategy']:<14}{r['mean_variance']:>10.3f}{r['final_variance']:>11.3f}"
+            f"{r['max_load']:>10}{r['reassignments']:>12}{r['dropped']:>9}"
+        )
+
+
+if __name__ == '__main__':
+    main()
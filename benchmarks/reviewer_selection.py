@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import time
+from itertools import combinations
+
+from sqlalchemy import insert
+
+from assignment import review_weight
+from database.crud.user_crud import UserCrud
+from database.gen_session import SessionLocal, engine
+from database.models import Team, User, PullRequest, PullRequestReviewer
+
+
+TEAM_NAME = '__bench_reviewer_selection'
+AUTHOR_ID = f'{TEAM_NAME}_author'
+
+
+def expected_pair_probabilities(loads):
+    weights = [review_weight(load) for load in loads]
+    total = sum(weights)
+    return {
+        (i, j): weights[i] / total * weights[j] / (total - weights[i])
+        + weights[j] / total * weights[i] / (total - weights[j])
+        for i, j in combinations(range(len(loads)), 2)
+    }
+
+
+async def seed(session, loads):
+    user_ids = [f'{TEAM_NAME}_u{idx}' for idx in range(len(loads))]
+
+    team_pk = (await session.execute(insert(Team).values(team_name=TEAM_NAME).returning(Team.id))).scalar_one()
+    users = await session.execute(
+        insert(User).returning(User.id, sort_by_parameter_order=True),
+        [
+            {'user_id': user_id, 'username': user_id, 'is_active': True, 'team_pk': team_pk}
+            for user_id in [AUTHOR_ID, *user_ids]
+        ]
+    )
+    author_pk, *user_pks = users.scalars().all()
+
+    pr_ids = [f'{TEAM_NAME}_pr{idx}' for idx in range(max(loads, default=0))]
+    if pr_ids:
+        prs = await session.execute(
+            insert(PullRequest).returning(PullRequest.id, sort_by_parameter_order=True),
+            [{'pull_request_id': pr_id, 'pull_request_name': pr_id, 'author_pk': author_pk} for pr_id in pr_ids]
+        )
+        pr_pks = prs.scalars().all()
+        await session.execute(insert(PullRequestReviewer), [
+            {'user_pk': user_pk, 'pull_request_pk': pr_pks[pr]}
+            for user_pk, load in zip(user_pks, loads) for pr in range(load)
+        ])
+
+    return user_ids
+
+
+async def run_mode(session, mode, trials):
+    counts = {}
+    started = time.perf_counter()
+    for _ in range(trials):
+        if mode == 'sql':
+            picked = await UserCrud.select_reviewers_in_db(session, TEAM_NAME, [AUTHOR_ID])
+        else:
+            candidates = await UserCrud.get_active_candidates(session, TEAM_NAME, [AUTHOR_ID])
+            picked = await UserCrud.select_reviewers_weighted(candidates)
+        pair = tuple(sorted(candidate.user_id for candidate in picked))
+        counts[pair] = counts.get(pair, 0) + 1
+    return counts, (time.perf_counter() - started) / trials
+
+
+async def main(loads, trials):
+    try:
+        async with SessionLocal() as session:
+            user_ids = await seed(session, loads)
+            expected = {
+                (user_ids[i], user_ids[j]): probability
+                for (i, j), probability in expected_pair_probabilities(loads).items()
+            }
+
+            for mode in ('python', 'sql'):
+                counts, latency = await run_mode(session, mode, trials)
+                chi2 = sum(
+                    (counts.get(pair, 0) - trials * probability) ** 2 / (trials * probability)
+                    for pair, probability in expected.items()
+                )
+                print(f'{mode:<7} {latency * 1000:7.3f} ms/selection  chi2={chi2:7.2f} (df={len(expected) - 1})')
+
+            await session.rollback()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Compare Python and in-database weighted reviewer selection (distribution and latency)'
+    )
+    parser.add_argument('--loads', default='0,1,3,6', help='Open review counts of the candidates')
+    parser.add_argument('--trials', type=int, default=5000)
+    args = parser.parse_args()
+
+    asyncio.run(main([int(load) for load in args.loads.split(',')], args.trials))
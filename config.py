@@ -5,6 +5,31 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def _route_map(value: str) -> dict:
+    routes = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        path, _, limit = item.partition('=')
+        routes[path.strip()] = float(limit)
+    return routes
+
+
+def _rate_limit_map(value: str) -> dict:
+    routes = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        path, _, limit = item.partition('=')
+        rate, _, burst = limit.partition(':')
+        routes[path.strip()] = (float(rate), float(burst or rate))
+    return routes
+
+
+def _team_map(value: str) -> dict:
+    teams = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        team_name, _, fallbacks = item.partition('=')
+        teams[team_name.strip()] = [team.strip() for team in fallbacks.split('|') if team.strip()]
+    return teams
+
+
 POSTGRES_USER = os.environ.get('POSTGRES_USER')
 POSTGRES_PASSWORD = os.environ.get('POSTGRES_PASSWORD')
 POSTGRES_IP = os.environ.get('POSTGRES_IP')
@@ -12,3 +37,61 @@ POSTGRES_PORT = int(os.environ.get('POSTGRES_PORT'))
 POSTGRES_DB = os.environ.get('POSTGRES_DB')
 
 API_PORT = int(os.environ.get('API_PORT'))
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_POOL_WARMUP = int(os.environ.get('DB_POOL_WARMUP', DB_POOL_SIZE))
+DB_STARTUP_TIMEOUT = float(os.environ.get('DB_STARTUP_TIMEOUT', 30))
+
+TEAM_SUMMARY_MEMBERS_LIMIT = int(os.environ.get('TEAM_SUMMARY_MEMBERS_LIMIT', 100))
+FALLBACK_TEAMS = _team_map(os.environ.get('FALLBACK_TEAMS', ''))
+REVIEWER_SELECTION = os.environ.get('REVIEWER_SELECTION', 'python')
+ASSIGNMENT_LOCKS = os.environ.get('ASSIGNMENT_LOCKS', 'true').lower() in ('1', 'true', 'yes')
+
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 30))
+ARCHIVE_BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', 1000))
+
+HEALTH_DB_PING_INTERVAL = float(os.environ.get('HEALTH_DB_PING_INTERVAL', 5))
+SHUTDOWN_READINESS_DELAY = float(os.environ.get('SHUTDOWN_READINESS_DELAY', 5))
+SHUTDOWN_DRAIN_TIMEOUT = int(os.environ.get('SHUTDOWN_DRAIN_TIMEOUT', 25))
+
+REQUEST_TIMEOUT = float(os.environ.get('REQUEST_TIMEOUT', 10))
+ROUTE_TIMEOUTS = _route_map(os.environ.get(
+    'ROUTE_TIMEOUTS',
+    '/pullRequest/create=3,/pullRequest/reassign=3,/users/reviewEvents=0'
+))
+MAX_IN_FLIGHT = int(os.environ.get('MAX_IN_FLIGHT', 200))
+SHED_RETRY_AFTER = int(os.environ.get('SHED_RETRY_AFTER', 1))
+
+RATE_LIMITS = _rate_limit_map(os.environ.get(
+    'RATE_LIMITS',
+    '/pullRequest/create=20:40,/pullRequest/reassign=5:10,/pullRequest/merge=20:40,/pullRequest/mergeBatch=2:5,'
+    '/users/setIsActive=5:10,/users/bulkSetIsActive=1:5,/users/moveToTeam=1:5,/team/add=2:5,/team/setIsActive=1:5'
+))
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_CLIENT_HEADER = os.environ.get('RATE_LIMIT_CLIENT_HEADER', 'X-Client-Id')
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+ACCESS_LOG_SAMPLE_RATE = float(os.environ.get('ACCESS_LOG_SAMPLE_RATE', 1.0))
+SLOW_REQUEST_MS = float(os.environ.get('SLOW_REQUEST_MS', 500))
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', 1.0))
+
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILE_HEADER = os.environ.get('PROFILE_HEADER', 'X-Profile')
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0.0))
+PROFILE_INTERVAL = float(os.environ.get('PROFILE_INTERVAL', 0.001))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/profiles')
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 100))
+
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+COMPRESSION_MINIMUM_SIZE = int(os.environ.get('COMPRESSION_MINIMUM_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+
+REVIEW_EVENTS_HEARTBEAT = float(os.environ.get('REVIEW_EVENTS_HEARTBEAT', 15))
+REVIEW_EVENTS_MAX_STREAMS = int(os.environ.get('REVIEW_EVENTS_MAX_STREAMS', 1000))
+REVIEW_EVENTS_QUEUE_SIZE = int(os.environ.get('REVIEW_EVENTS_QUEUE_SIZE', 100))
+REVIEW_EVENTS_REPLAY_LIMIT = int(os.environ.get('REVIEW_EVENTS_REPLAY_LIMIT', 500))
+REVIEW_EVENTS_REPLAY_CONCURRENCY = int(os.environ.get('REVIEW_EVENTS_REPLAY_CONCURRENCY', 2))
+REVIEW_EVENTS_RETENTION_DAYS = int(os.environ.get('REVIEW_EVENTS_RETENTION_DAYS', 7))
@@ -0,0 +1,6 @@
+"""Data access for the API routes.
+
+Hot statements are built once at module level with bound parameters: per call SQLAlchemy only looks up
+the compiled form, and lists travel as one array parameter, so asyncpg reuses a single prepared statement
+for any length.
+"""
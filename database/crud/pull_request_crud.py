@@ -1,36 +1,443 @@
-from typing import Optional, List
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple, TYPE_CHECKING
+
+from sqlalchemy import select, delete, insert, update, union_all, exists, func, any_, bindparam, column, values, \
+    tuple_, BigInteger, JSON, Row, String
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from assignment import Candidate, select_replacement
+from database.crud.team_crud import TeamCrud
+from database.crud.user_crud import UserCrud
+from database.models import PullRequest, PullRequestReviewer, PRStatus, PullRequestArchive, \
+    PullRequestReviewerArchive, User, Team
+
+if TYPE_CHECKING:
+    from api.schemas import PullRequestCreateSchema
+
+
+def _pr_columns(table):
+    return (
+        table.pull_request_id,
+        table.pull_request_name,
+        User.user_id.label('author_id'),
+        table.status,
+        table.created_at,
+        table.merged_at
+    )
+
+
+def _pr_info_columns(table, reviewer_table):
+    reviewer = aliased(User)
+    reviewer_ids = (
+        select(reviewer.user_id)
+        .join(reviewer_table, reviewer_table.user_pk == reviewer.id)
+        .where(reviewer_table.pull_request_pk == table.id)
+        .order_by(reviewer.user_id)
+        .correlate(table)
+        .scalar_subquery()
+    )
+    return (
+        table.id,
+        *_pr_columns(table),
+        func.array(reviewer_ids, type_=ARRAY(String)).label('assigned_reviewers')
+    )
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+_IDS = bindparam('pull_request_ids', type_=ARRAY(String))
+
+_ROW_BY_ID = (
+    select(*_pr_columns(PullRequest))
+    .join(User, User.id == PullRequest.author_pk)
+    .where(PullRequest.pull_request_id == bindparam('pull_request_id'))
+)
 
-from api.schemas import PullRequestCreateSchema
-from database.models import PullRequest, User, PullRequestReviewer
+_INFO = union_all(
+    select(*_pr_info_columns(PullRequest, PullRequestReviewer))
+    .join(User, User.id == PullRequest.author_pk)
+    .where(PullRequest.pull_request_id == bindparam('pull_request_id')),
+    select(*_pr_info_columns(PullRequestArchive, PullRequestReviewerArchive))
+    .join(User, User.id == PullRequestArchive.author_pk)
+    .where(PullRequestArchive.pull_request_id == bindparam('pull_request_id'))
+)
+
+_EXISTS = select(
+    exists().where(PullRequest.pull_request_id == bindparam('pull_request_id'))
+    | exists().where(PullRequestArchive.pull_request_id == bindparam('pull_request_id'))
+)
+
+# DML targets the tables: executed with a parameter dict, an ORM entity statement would switch to bulk mode
+_ADD_REVIEWERS = (
+    insert(PullRequestReviewer.__table__)
+    .from_select(
+        ['user_pk', 'pull_request_pk'],
+        select(User.id, bindparam('new_pull_request_pk', type_=BigInteger))
+        .where(User.user_id == any_(bindparam('user_ids', type_=ARRAY(String))))
+    )
+)
+
+
+def _user_pk(param: str):
+    return select(User.id).where(User.user_id == bindparam(param)).scalar_subquery()
+
+
+_REPLACE_REVIEWER = (
+    update(PullRequestReviewer.__table__)
+    .where(
+        PullRequestReviewer.pull_request_pk == PullRequest.id,
+        PullRequest.pull_request_id == bindparam('pull_request_id'),
+        PullRequestReviewer.user_pk == _user_pk('old_user_id')
+    )
+    .values(user_pk=_user_pk('new_user_id'))
+)
+
+_MERGE = (
+    update(PullRequest.__table__)
+    .where(
+        PullRequest.pull_request_id == any_(_IDS),
+        PullRequest.status == PRStatus.OPEN,
+        User.id == PullRequest.author_pk
+    )
+    .values(status=PRStatus.MERGED, merged_at=func.now())
+    .returning(*_pr_columns(PullRequest))
+)
+
+_ROWS_BY_IDS = union_all(
+    select(*_pr_columns(PullRequest))
+    .join(User, User.id == PullRequest.author_pk)
+    .where(PullRequest.pull_request_id == any_(_IDS)),
+    select(*_pr_columns(PullRequestArchive))
+    .join(User, User.id == PullRequestArchive.author_pk)
+    .where(PullRequestArchive.pull_request_id == any_(_IDS))
+)
+
+
+def _reviewers_many():
+    reviewers = union_all(
+        select(PullRequest.pull_request_id, PullRequestReviewer.user_pk)
+        .join(PullRequestReviewer, PullRequestReviewer.pull_request_pk == PullRequest.id)
+        .where(PullRequest.pull_request_id == any_(_IDS)),
+        select(PullRequestArchive.pull_request_id, PullRequestReviewerArchive.user_pk)
+        .join(PullRequestReviewerArchive, PullRequestReviewerArchive.pull_request_pk == PullRequestArchive.id)
+        .where(PullRequestArchive.pull_request_id == any_(_IDS))
+    ).subquery()
+
+    user = func.json_build_object(
+        'user_id', User.user_id,
+        'username', User.username,
+        'team_name', Team.team_name,
+        'is_active', User.is_active
+    )
+    return (
+        select(
+            reviewers.c.pull_request_id,
+            func.json_agg(aggregate_order_by(user, User.user_id), type_=JSON)
+        )
+        .join(User, User.id == reviewers.c.user_pk)
+        .join(Team, Team.id == User.team_pk)
+        .group_by(reviewers.c.pull_request_id)
+    )
+
+
+_REVIEWERS_MANY = _reviewers_many()
+
+
+def _reviews_by_user(table, reviewer_table):
+    return (
+        select(
+            table.pull_request_id,
+            table.pull_request_name,
+            User.user_id.label('author_id'),
+            table.status
+        )
+        .join(reviewer_table, reviewer_table.pull_request_pk == table.id)
+        .join(User, User.id == table.author_pk)
+        .where(reviewer_table.user_pk == _user_pk('user_id'))
+    )
+
+
+_REVIEWS_BY_USER = _reviews_by_user(PullRequest, PullRequestReviewer)
+_REVIEWS_BY_USER_WITH_ARCHIVED = union_all(
+    _REVIEWS_BY_USER,
+    _reviews_by_user(PullRequestArchive, PullRequestReviewerArchive)
+)
 
 
 class PullRequestCrud:
     @staticmethod
-    async def get_by_id(session: AsyncSession, pull_request_id: str) -> Optional[PullRequest]:
-        pr = await session.get(PullRequest, pull_request_id)
-        return pr
+    async def exists(session: AsyncSession, pull_request_id: str) -> bool:
+        result = await session.execute(_EXISTS, {'pull_request_id': pull_request_id})
+        return result.scalar_one()
+
+    @staticmethod
+    async def get_row_by_id(session: AsyncSession, pull_request_id: str):
+        result = await session.execute(_ROW_BY_ID, {'pull_request_id': pull_request_id})
+        return result.one_or_none()
+
+    @staticmethod
+    async def get_info(session: AsyncSession, pull_request_id: str):
+        result = await session.execute(_INFO, {'pull_request_id': pull_request_id})
+        return result.first()
+
+    @staticmethod
+    async def search(
+            session: AsyncSession,
+            name: Optional[str] = None,
+            author_id: Optional[str] = None,
+            status: Optional[PRStatus] = None,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+            after: Optional[Tuple[datetime, int]] = None,
+            limit: int = 50,
+            include_archived: bool = False
+    ) -> List[Row]:
+        def page(table, reviewer_table):
+            query = (
+                select(*_pr_info_columns(table, reviewer_table))
+                .join(User, User.id == table.author_pk)
+                .order_by(table.created_at.desc(), table.id.desc())
+                .limit(limit)
+            )
+            if name is not None:
+                query = query.where(table.pull_request_name.ilike(f'%{_escape_like(name)}%', escape='\\'))
+            if author_id is not None:
+                query = query.where(
+                    table.author_pk == select(User.id).where(User.user_id == author_id).scalar_subquery()
+                )
+            if status is not None:
+                query = query.where(table.status == status)
+            if created_from is not None:
+                query = query.where(table.created_at >= created_from)
+            if created_to is not None:
+                query = query.where(table.created_at < created_to)
+            if after is not None:
+                query = query.where(tuple_(table.created_at, table.id) < after)
+            return query
+
+        query = page(PullRequest, PullRequestReviewer)
+        # Archived PRs are always merged
+        if include_archived and status != PRStatus.OPEN:
+            pages = union_all(query, page(PullRequestArchive, PullRequestReviewerArchive)).subquery()
+            query = select(pages).order_by(pages.c.created_at.desc(), pages.c.id.desc()).limit(limit)
+
+        result = await session.execute(query)
+        return result.all()
 
     @staticmethod
     async def create(
             session: AsyncSession,
-            pr_data: PullRequestCreateSchema,
-            author: User,
-            reviewers: List[User]
+            pr_data: 'PullRequestCreateSchema',
+            author: Row,
+            reviewers: List[Candidate]
     ) -> PullRequest:
         new_pr = PullRequest(
             pull_request_id=pr_data.pull_request_id,
             pull_request_name=pr_data.pull_request_name,
-            author_id=author.user_id
+            author_pk=author.id
         )
         session.add(new_pr)
         await session.flush()
 
-        for reviewer in reviewers:
-            pr_reviewer = PullRequestReviewer(
-                user_id=reviewer.user_id,
-                pull_request_id=new_pr.pull_request_id
-            )
-            session.add(pr_reviewer)
+        if reviewers:
+            await session.execute(_ADD_REVIEWERS, {
+                'new_pull_request_pk': new_pr.id,
+                'user_ids': [reviewer.user_id for reviewer in reviewers]
+            })
 
         return new_pr
+
+    @staticmethod
+    async def replace_reviewer(
+            session: AsyncSession,
+            pull_request_id: str,
+            old_user_id: str,
+            new_user_id: str
+    ) -> int:
+        result = await session.execute(_REPLACE_REVIEWER, {
+            'pull_request_id': pull_request_id,
+            'old_user_id': old_user_id,
+            'new_user_id': new_user_id
+        })
+        return result.rowcount
+
+    @staticmethod
+    async def redistribute_reviews(
+            session: AsyncSession,
+            user_teams: Dict[str, str],
+            fallback_teams: Optional[Dict[str, List[str]]] = None,
+            lock_teams: bool = False
+    ) -> List[Dict[str, Optional[str]]]:
+        if lock_teams:
+            await TeamCrud.lock_assignments(session, user_teams.values(), fallback_teams)
+
+        removed = await session.execute(
+            delete(PullRequestReviewer)
+            .where(
+                PullRequestReviewer.user_pk == User.id,
+                User.user_id.in_(list(user_teams)),
+                PullRequestReviewer.pull_request_pk == PullRequest.id,
+                PullRequest.status == PRStatus.OPEN
+            )
+            .returning(PullRequest.pull_request_id, User.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        slots = sorted(removed.all())
+
+        if not slots:
+            return []
+
+        author = aliased(User)
+        reviewer = aliased(User)
+        pr_rows = await session.execute(
+            select(PullRequest.pull_request_id, author.user_id, reviewer.user_id)
+            .join(author, author.id == PullRequest.author_pk)
+            .outerjoin(PullRequestReviewer, PullRequestReviewer.pull_request_pk == PullRequest.id)
+            .outerjoin(reviewer, reviewer.id == PullRequestReviewer.user_pk)
+            .where(PullRequest.pull_request_id.in_({pr_id for pr_id, _ in slots}))
+        )
+
+        taken = defaultdict(set)
+        for pr_id, author_id, reviewer_id in pr_rows:
+            taken[pr_id].add(author_id)
+            if reviewer_id is not None:
+                taken[pr_id].add(reviewer_id)
+
+        # Moved users stay active and may sit in a fallback of their old team, they must not take back their own slots
+        pools = await UserCrud.get_candidate_pools(
+            session, set(user_teams.values()), exclude_ids=list(user_teams), fallback_teams=fallback_teams
+        )
+
+        candidates_by_user = defaultdict(list)
+        for pool in pools.values():
+            for candidate in pool:
+                candidates_by_user[candidate.user_id].append(candidate)
+
+        reassignments = []
+        new_associations = []
+        for pr_id, old_user_id in slots:
+            replacement = select_replacement(pools[user_teams[old_user_id]], taken[pr_id])
+
+            replaced_by = None
+            if replacement is not None:
+                replaced_by = replacement.user_id
+                for candidate in candidates_by_user[replaced_by]:
+                    candidate.open_count += 1
+                taken[pr_id].add(replaced_by)
+                new_associations.append((replaced_by, pr_id))
+
+            reassignments.append({
+                'pull_request_id': pr_id,
+                'old_user_id': old_user_id,
+                'replaced_by': replaced_by
+            })
+
+        if new_associations:
+            assignments = (
+                values(column('user_id', String), column('pull_request_id', String), name='assignments')
+                .data(new_associations)
+            )
+            await session.execute(
+                insert(PullRequestReviewer)
+                .from_select(
+                    ['user_pk', 'pull_request_pk'],
+                    select(User.id, PullRequest.id)
+                    .select_from(assignments)
+                    .join(User, User.user_id == assignments.c.user_id)
+                    .join(PullRequest, PullRequest.pull_request_id == assignments.c.pull_request_id)
+                )
+            )
+
+        return reassignments
+
+    @staticmethod
+    async def merge_many(session: AsyncSession, pull_request_ids: List[str]) -> List[Row]:
+        merged = await session.execute(_MERGE, {'pull_request_ids': list(pull_request_ids)})
+        rows = merged.all()
+
+        remaining_ids = set(pull_request_ids) - {row.pull_request_id for row in rows}
+        if not remaining_ids:
+            return rows
+
+        existing = await session.execute(_ROWS_BY_IDS, {'pull_request_ids': list(remaining_ids)})
+        return rows + existing.all()
+
+    @staticmethod
+    async def get_reviewers_many(session: AsyncSession, pull_request_ids: List[str]) -> Dict[str, List[dict]]:
+        result = await session.execute(_REVIEWERS_MANY, {'pull_request_ids': list(pull_request_ids)})
+        return dict(result.tuples().all())
+
+    @staticmethod
+    async def get_reviews_by_user(
+            session: AsyncSession,
+            user_id: str,
+            include_archived: bool = False
+    ):
+        result = await session.execute(
+            _REVIEWS_BY_USER_WITH_ARCHIVED if include_archived else _REVIEWS_BY_USER,
+            {'user_id': user_id}
+        )
+        return result.all()
+
+    @staticmethod
+    async def archive_merged(
+            session: AsyncSession,
+            merged_before: datetime,
+            batch_size: int
+    ) -> int:
+        batch = await session.execute(
+            select(PullRequest.id)
+            .where(
+                PullRequest.status == PRStatus.MERGED,
+                PullRequest.merged_at < merged_before
+            )
+            .order_by(PullRequest.merged_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        pr_pks = batch.scalars().all()
+
+        if not pr_pks:
+            return 0
+
+        await session.execute(
+            insert(PullRequestArchive)
+            .from_select(
+                ['id', 'pull_request_id', 'pull_request_name', 'status', 'author_pk', 'created_at', 'merged_at'],
+                select(
+                    PullRequest.id,
+                    PullRequest.pull_request_id,
+                    PullRequest.pull_request_name,
+                    PullRequest.status,
+                    PullRequest.author_pk,
+                    PullRequest.created_at,
+                    PullRequest.merged_at
+                )
+                .where(PullRequest.id.in_(pr_pks))
+            )
+        )
+
+        moved_reviewers = (
+            delete(PullRequestReviewer)
+            .where(PullRequestReviewer.pull_request_pk.in_(pr_pks))
+            .returning(PullRequestReviewer.user_pk, PullRequestReviewer.pull_request_pk)
+            .cte('moved_reviewers')
+        )
+        await session.execute(
+            insert(PullRequestReviewerArchive)
+            .from_select(['user_pk', 'pull_request_pk'], select(moved_reviewers))
+            .add_cte(moved_reviewers)
+        )
+
+        await session.execute(
+            delete(PullRequest)
+            .where(PullRequest.id.in_(pr_pks))
+            .execution_options(synchronize_session=False)
+        )
+
+        return len(pr_pks)
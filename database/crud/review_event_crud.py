@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import List, Optional, Iterable
+
+from sqlalchemy import select, delete, func, cast, all_, bindparam, BigInteger, Text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import ReviewEvent, User
+
+
+# Every transaction with a smaller id has finished: its events are either visible or will never exist
+_HORIZON = select(cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger))
+
+_SINCE = (
+    select(ReviewEvent.id, ReviewEvent.xid, ReviewEvent.payload)
+    .join(User, User.id == ReviewEvent.user_pk)
+    .where(
+        User.user_id == bindparam('user_id'),
+        ReviewEvent.xid >= bindparam('horizon'),
+        ReviewEvent.id != all_(bindparam('seen_ids', type_=ARRAY(BigInteger)))
+    )
+    .order_by(ReviewEvent.xid, ReviewEvent.id)
+    .limit(bindparam('limit'))
+)
+
+
+class ReviewEventCrud:
+    @staticmethod
+    async def get_horizon(session: AsyncSession) -> int:
+        result = await session.execute(_HORIZON)
+        return result.scalar_one()
+
+    @staticmethod
+    async def get_since(
+            session: AsyncSession,
+            user_id: str,
+            horizon: int,
+            seen_ids: Iterable[int] = (),
+            limit: Optional[int] = None
+    ) -> List[dict]:
+        result = await session.execute(_SINCE, {
+            'user_id': user_id,
+            'horizon': horizon,
+            'seen_ids': list(seen_ids),
+            'limit': limit
+        })
+        return [{**payload, 'id': event_id, 'xid': xid} for event_id, xid, payload in result]
+
+    @staticmethod
+    async def prune(session: AsyncSession, created_before: datetime) -> int:
+        result = await session.execute(
+            delete(ReviewEvent)
+            .where(ReviewEvent.created_at < created_before)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
@@ -1,20 +1,111 @@
-from typing import Optional
+from typing import Optional, List, Dict, Iterable
 
-from sqlalchemy import select
+from sqlalchemy import select, func, and_, literal, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import Team
+from assignment import fallback_chain
+from database.models import Team, User, PullRequest, PullRequestReviewer, PRStatus
+
+
+ASSIGNMENT_LOCK_NAMESPACE = 42
+
+
+_LOCK_ASSIGNMENTS = select(
+    func.pg_advisory_xact_lock(literal(ASSIGNMENT_LOCK_NAMESPACE), func.hashtext(bindparam('team_name')))
+)
+
+_MEMBERS = (
+    select(User.user_id, User.username, User.is_active)
+    .join(Team, Team.id == User.team_pk)
+    .where(Team.team_name == bindparam('team_name'))
+    .order_by(User.user_id)
+    .limit(bindparam('limit'))
+)
+_MEMBERS_AFTER = _MEMBERS.where(User.user_id > bindparam('after_user_id'))
+
+
+def _summary():
+    def member_count(is_active: bool):
+        return (
+            select(func.count())
+            .where(User.team_pk == Team.id, User.is_active.is_(is_active))
+            .scalar_subquery()
+        )
+
+    open_reviews = (
+        select(func.count())
+        .select_from(PullRequestReviewer)
+        .join(User, User.id == PullRequestReviewer.user_pk)
+        .join(
+            PullRequest,
+            and_(
+                PullRequest.id == PullRequestReviewer.pull_request_pk,
+                PullRequest.status == PRStatus.OPEN
+            )
+        )
+        .where(User.team_pk == Team.id)
+        .scalar_subquery()
+    )
+
+    return (
+        select(
+            Team.team_name,
+            member_count(True).label('active_members'),
+            member_count(False).label('inactive_members'),
+            open_reviews.label('open_reviews')
+        )
+        .where(Team.team_name == bindparam('team_name'))
+    )
+
+
+_SUMMARY = _summary()
 
 
 class TeamCrud:
     @staticmethod
     async def get_by_name(session: AsyncSession, team_name: str) -> Optional[Team]:
-        team = await session.get(Team, team_name)
-        return team
+        result = await session.execute(select(Team).where(Team.team_name == team_name))
+        return result.scalar_one_or_none()
 
     @staticmethod
     async def create(session: AsyncSession, team_name: str):
         team = Team(team_name=team_name)
         session.add(team)
+        await session.flush()
 
         return team
+
+    @staticmethod
+    async def lock_assignments(
+            session: AsyncSession,
+            team_names: Iterable[str],
+            fallback_teams: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        # Fallback teams lend reviewers too, their load counts are read under the same locks
+        locked = set(team_names)
+        for team_name in list(locked):
+            locked.update(fallback_chain(team_name, fallback_teams))
+
+        for team_name in sorted(locked):
+            await session.execute(_LOCK_ASSIGNMENTS, {'team_name': team_name})
+
+    @staticmethod
+    async def get_members(
+            session: AsyncSession,
+            team_name: str,
+            after_user_id: Optional[str] = None,
+            limit: int = 100
+    ):
+        if after_user_id is None:
+            result = await session.execute(_MEMBERS, {'team_name': team_name, 'limit': limit})
+        else:
+            result = await session.execute(
+                _MEMBERS_AFTER,
+                {'team_name': team_name, 'after_user_id': after_user_id, 'limit': limit}
+            )
+        return result.all()
+
+    @staticmethod
+    async def get_summary(session: AsyncSession, team_name: str):
+        result = await session.execute(_SUMMARY, {'team_name': team_name})
+        return result.one_or_none()
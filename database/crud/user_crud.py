@@ -1,17 +1,156 @@
-from random import choices
-from typing import Optional, List
+from collections import defaultdict
+from typing import Any, Optional, List, Dict, Iterable
 
-from sqlalchemy import select
+from sqlalchemy import select, update, func, and_, or_, any_, all_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from database.models import User, PRStatus
+from assignment import Candidate, ACTIVE, FALLBACK, select_reviewers, fallback_chain
+from database.models import User, Team, PRStatus, PullRequest, PullRequestReviewer
+
+
+def _candidates_query():
+    open_count = func.count(PullRequest.id)
+
+    query = (
+        select(User.user_id, open_count)
+        .join(Team, Team.id == User.team_pk)
+        .outerjoin(PullRequestReviewer, PullRequestReviewer.user_pk == User.id)
+        .outerjoin(
+            PullRequest,
+            and_(
+                PullRequest.id == PullRequestReviewer.pull_request_pk,
+                PullRequest.status == PRStatus.OPEN
+            )
+        )
+        .where(
+            Team.team_name == any_(bindparam('team_names', type_=ARRAY(String))),
+            User.is_active.is_(True),
+            or_(User.unavailable_until.is_(None), User.unavailable_until <= func.now()),
+            User.user_id != all_(bindparam('exclude_ids', type_=ARRAY(String)))
+        )
+        .group_by(User.id, Team.id)
+        .having(or_(User.max_open_reviews.is_(None), open_count < User.max_open_reviews))
+    )
+
+    return query, open_count
+
+
+_candidates, _open_count = _candidates_query()
+
+_CANDIDATE_POOLS = (
+    _candidates
+    .add_columns(Team.team_name, User.max_open_reviews)
+    .order_by(_open_count, User.user_id)
+)
+
+_SELECT_REVIEWERS = (
+    _candidates
+    .order_by(-func.ln(1 - func.random()) * (1 + _open_count))
+    .limit(bindparam('k'))
+)
+
+_ROW_BY_ID = (
+    select(User.id, User.user_id, User.username, Team.team_name, User.is_active)
+    .join(Team, Team.id == User.team_pk)
+    .where(User.user_id == bindparam('user_id'))
+)
+
+_MANY = (
+    select(User.user_id, User.username, Team.team_name, User.is_active)
+    .join(Team, Team.id == User.team_pk)
+    .where(User.user_id == any_(bindparam('user_ids', type_=ARRAY(String))))
+    .order_by(User.user_id)
+)
 
 
 class UserCrud:
     @staticmethod
     async def get_by_id(session: AsyncSession, user_id: str) -> Optional[User]:
-        user = await session.get(User, user_id)
-        return user
+        result = await session.execute(select(User).where(User.user_id == user_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_row_by_id(session: AsyncSession, user_id: str):
+        result = await session.execute(_ROW_BY_ID, {'user_id': user_id})
+        return result.one_or_none()
+
+    @staticmethod
+    async def get_many(session: AsyncSession, user_ids: List[str]):
+        result = await session.execute(_MANY, {'user_ids': list(user_ids)})
+        return result.all()
+
+    @staticmethod
+    async def get_team_member_ids(session: AsyncSession, team_name: str) -> List[str]:
+        result = await session.execute(
+            select(User.user_id)
+            .join(Team, Team.id == User.team_pk)
+            .where(Team.team_name == team_name)
+        )
+
+        return result.scalars().all()
+
+    @staticmethod
+    async def bulk_set_is_active(
+            session: AsyncSession,
+            user_ids: List[str],
+            is_active: bool
+    ) -> Dict[str, str]:
+        result = await session.execute(
+            update(User)
+            .where(
+                User.user_id.in_(user_ids),
+                User.is_active != is_active,
+                Team.id == User.team_pk
+            )
+            .values(is_active=is_active)
+            .returning(User.user_id, Team.team_name)
+            .execution_options(synchronize_session=False)
+        )
+
+        return {user_id: team_name for user_id, team_name in result}
+
+    @staticmethod
+    async def move_to_team(
+            session: AsyncSession,
+            user_ids: List[str],
+            team_name: str
+    ) -> Dict[str, str]:
+        previous = aliased(User)
+        team_pk = select(Team.id).where(Team.team_name == team_name).scalar_subquery()
+        result = await session.execute(
+            update(User)
+            .where(
+                User.id == previous.id,
+                Team.id == previous.team_pk,
+                User.user_id.in_(user_ids),
+                User.team_pk != team_pk
+            )
+            .values(team_pk=team_pk)
+            .returning(User.user_id, Team.team_name)
+            .execution_options(synchronize_session=False)
+        )
+
+        return {user_id: old_team_name for user_id, old_team_name in result}
+
+    @staticmethod
+    async def set_availability(session: AsyncSession, user_id: str, values: Dict[str, Any]):
+        # Only the given columns change, fields left out of the request keep their stored value
+        columns = (User.user_id, User.max_open_reviews, User.unavailable_until)
+        if not values:
+            result = await session.execute(select(*columns).where(User.user_id == user_id))
+            return result.one_or_none()
+
+        result = await session.execute(
+            update(User)
+            .where(User.user_id == user_id)
+            .values(values)
+            .returning(*columns)
+            .execution_options(synchronize_session=False)
+        )
+
+        return result.one_or_none()
 
     @staticmethod
     async def create_or_update(
@@ -19,20 +158,20 @@ class UserCrud:
             user_id: str,
             username: str,
             is_active: bool,
-            team_name: str
+            team_pk: int
     ) -> User:
         user = await UserCrud.get_by_id(session, user_id)
 
         if user:
             user.username = username
             user.is_active = is_active
-            user.team_name = team_name
+            user.team_pk = team_pk
         else:
             user = User(
                 user_id=user_id,
                 username=username,
                 is_active=is_active,
-                team_name=team_name
+                team_pk=team_pk
             )
             session.add(user)
 
@@ -42,53 +181,60 @@ class UserCrud:
     async def get_active_candidates(
             session: AsyncSession,
             team_name: str,
-            exclude_ids: List[str]
-    ) -> List[User]:
+            exclude_ids: List[str],
+            fallback_teams: Optional[Dict[str, List[str]]] = None
+    ) -> List[Candidate]:
+        pools = await UserCrud.get_candidate_pools(session, [team_name], exclude_ids, fallback_teams)
+        return pools[team_name]
+
+    @staticmethod
+    async def get_candidate_pools(
+            session: AsyncSession,
+            team_names: Iterable[str],
+            exclude_ids: Iterable[str] = (),
+            fallback_teams: Optional[Dict[str, List[str]]] = None
+    ) -> Dict[str, List[Candidate]]:
+        team_names = list(team_names)
+        fallbacks = {team_name: fallback_chain(team_name, fallback_teams) for team_name in team_names}
+        result = await session.execute(_CANDIDATE_POOLS, {
+            'team_names': list({*team_names, *(team for teams in fallbacks.values() for team in teams)}),
+            'exclude_ids': list(exclude_ids)
+        })
+
+        by_team = defaultdict(list)
+        for user_id, count, team_name, max_open_reviews in result:
+            by_team[team_name].append((user_id, count, max_open_reviews))
+
+        pools = {}
+        for team_name in team_names:
+            pools[team_name] = [
+                Candidate(user_id, count, ACTIVE, max_open_reviews)
+                for user_id, count, max_open_reviews in by_team[team_name]
+            ]
+            for fallback in fallbacks[team_name]:
+                pools[team_name].extend(
+                    Candidate(user_id, count, ACTIVE | FALLBACK, max_open_reviews)
+                    for user_id, count, max_open_reviews in by_team[fallback]
+                )
+
+        return pools
+
+    @staticmethod
+    async def select_reviewers_in_db(
+            session: AsyncSession,
+            team_name: str,
+            exclude_ids: List[str],
+            k: int = 2
+    ) -> List[Candidate]:
         result = await session.execute(
-            select(User)
-            .where(
-                User.team_name == team_name,
-                User.is_active.is_(True),
-                User.user_id.notin_(exclude_ids)
-            )
+            _SELECT_REVIEWERS,
+            {'team_names': [team_name], 'exclude_ids': list(exclude_ids), 'k': k}
         )
 
-        return result.scalars().all()
+        return [Candidate(user_id, count, ACTIVE) for user_id, count in result]
 
     @staticmethod
     async def select_reviewers_weighted(
-            candidates: List[User]
-    ) -> List[User]:
-        if not candidates:
-            return []
-        if len(candidates) <= 2:
-            return candidates
-
-
-        candidate_weights = []
-        for user in candidates:
-            open_reviews_count = sum(
-                1 for pr in user.assigned_reviews
-                if pr.status == PRStatus.OPEN
-            )
-
-            weight = 1 / (1 + open_reviews_count)
-            candidate_weights.append((user, weight))
-
-        users_pool = [cw[0] for cw in candidate_weights]
-        weights_pool = [cw[1] for cw in candidate_weights]
-
-        selected_reviewers = []
-
-        reviewer1 = choices(users_pool, weights=weights_pool, k=1)[0]
-        selected_reviewers.append(reviewer1)
-
-        idx_to_remove = users_pool.index(reviewer1)
-
-        users_pool.pop(idx_to_remove)
-        weights_pool.pop(idx_to_remove)
-
-        reviewer2 = choices(users_pool, weights=weights_pool, k=1)[0]
-        selected_reviewers.append(reviewer2)
-
-        return selected_reviewers
+            candidates: List[Candidate]
+    ) -> List[Candidate]:
+        return select_reviewers(candidates)
@@ -1,10 +1,11 @@
-from typing import Generator
+import asyncio
+from typing import Generator, Awaitable, Callable, Sequence
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession, create_async_engine
-from config import POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_IP, POSTGRES_PORT, POSTGRES_DB
+from config import POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_IP, POSTGRES_PORT, POSTGRES_DB, DB_POOL_SIZE
 
 
 DATABASE_URL = f'postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_IP}:{POSTGRES_PORT}/{POSTGRES_DB}'
-engine = create_async_engine(DATABASE_URL, future=True)
+engine = create_async_engine(DATABASE_URL, future=True, pool_size=DB_POOL_SIZE)
 SessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, autocommit=False,
                                   autoflush=False, class_=AsyncSession, future=True)
 
@@ -14,4 +15,18 @@ async def get_session() -> Generator:
     try:
         yield session
     finally:
-        await session.close()
\ No newline at end of file
+        await session.close()
+
+
+async def warm_up(
+        connections: int,
+        statements: Sequence[Callable[[AsyncSession], Awaitable]] = ()
+) -> None:
+    async def _warm_connection():
+        async with SessionLocal() as session:
+            await session.connection()
+            for statement in statements:
+                await statement(session)
+            await session.rollback()
+
+    await asyncio.gather(*(_warm_connection() for _ in range(connections)))
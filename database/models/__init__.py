@@ -1,3 +1,4 @@
 from .models import *
 
-__all__ = ['User', 'PRStatus', 'Team', 'PullRequest', 'PullRequestReviewer', 'Base']
+__all__ = ['User', 'PRStatus', 'Team', 'PullRequest', 'PullRequestReviewer', 'PullRequestArchive',
+           'PullRequestReviewerArchive', 'ReviewEvent', 'RateLimitBucket', 'Base']
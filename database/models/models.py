@@ -1,9 +1,10 @@
 import enum
 from typing import List, Optional
-from sqlalchemy import String, Boolean, ForeignKey, Enum, DateTime
+from sqlalchemy import String, Boolean, ForeignKey, Enum, DateTime, Index, Float, Integer, BigInteger, Identity
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from datetime import datetime
 
 
@@ -19,9 +20,10 @@ class PRStatus(enum.Enum):
 class Team(Base):
     __tablename__ = 'teams'
 
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
     team_name: Mapped[str] = mapped_column(
         String,
-        primary_key=True,
+        nullable=False,
         unique=True,
         index=True
     )
@@ -30,53 +32,63 @@ class Team(Base):
         'User',
         back_populates='team',
         cascade='all, delete-orphan',
-        lazy='selectin'
+        lazy='raise'
     )
 
 
 class User(Base):
     __tablename__ = 'users'
-
-    user_id: Mapped[str] = mapped_column(String, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
     username: Mapped[str] = mapped_column(String, nullable=False)
     is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
 
-    team_name: Mapped[str] = mapped_column(
-        String,
-        ForeignKey('teams.team_name'),
+    max_open_reviews: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    unavailable_until: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    team_pk: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('teams.id'),
         nullable=False
     )
 
     team: Mapped['Team'] = relationship(
         'Team',
         back_populates='members',
-        lazy='selectin'
+        lazy='raise'
     )
 
     authored_pull_requests: Mapped[List['PullRequest']] = relationship(
         'PullRequest',
         back_populates='author',
-        foreign_keys='PullRequest.author_id',
-        lazy='selectin'
+        foreign_keys='PullRequest.author_pk',
+        lazy='raise'
     )
 
     reviewer_associations: Mapped[List['PullRequestReviewer']] = relationship(
         'PullRequestReviewer',
         back_populates='user',
-        lazy='selectin',
+        lazy='raise',
         cascade='all, delete-orphan',
         passive_deletes=True
     )
 
-    @property
-    def assigned_reviews(self) -> List['PullRequest']:
-        return [assoc.pull_request for assoc in self.reviewer_associations]
+    __table_args__ = (
+        Index('ix_users_team_pk_user_id', 'team_pk', 'user_id'),
+        Index(
+            'ix_users_available_by_team',
+            'team_pk',
+            'unavailable_until',
+            postgresql_where=(is_active.is_(True))
+        ),
+    )
 
 
 class PullRequest(Base):
     __tablename__ = 'pull_requests'
 
-    pull_request_id: Mapped[str] = mapped_column(String, primary_key=True)
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    pull_request_id: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
     pull_request_name: Mapped[str] = mapped_column(String, nullable=False)
 
     status: Mapped[PRStatus] = mapped_column(
@@ -85,16 +97,16 @@ class PullRequest(Base):
         default=PRStatus.OPEN
     )
 
-    author_id: Mapped[str] = mapped_column(
-        String,
-        ForeignKey('users.user_id'),
+    author_pk: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('users.id'),
         nullable=False
     )
 
     author: Mapped['User'] = relationship(
         'User',
         back_populates='authored_pull_requests',
-        foreign_keys=[author_id],
+        foreign_keys=[author_pk],
         lazy='selectin'
     )
 
@@ -120,18 +132,32 @@ class PullRequest(Base):
         nullable=True
     )
 
+    __table_args__ = (
+        Index(
+            'ix_pull_requests_merged_at_merged',
+            'merged_at',
+            postgresql_where=(status == PRStatus.MERGED)
+        ),
+        Index('ix_pull_requests_created_at_id', 'created_at', 'id'),
+        Index('ix_pull_requests_author_pk_created_at_id', 'author_pk', 'created_at', 'id'),
+        Index('ix_pull_requests_status_created_at_id', 'status', 'created_at', 'id'),
+    )
+
 
 class PullRequestReviewer(Base):
     __tablename__ = 'pull_request_reviewers'
+    __table_args__ = (
+        Index('ix_pull_request_reviewers_pull_request_pk', 'pull_request_pk'),
+    )
 
-    user_id: Mapped[str] = mapped_column(
-        String,
-        ForeignKey('users.user_id'),
+    user_pk: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('users.id'),
         primary_key=True
     )
-    pull_request_id: Mapped[str] = mapped_column(
-        String,
-        ForeignKey('pull_requests.pull_request_id'),
+    pull_request_pk: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('pull_requests.id'),
         primary_key=True
     )
 
@@ -144,4 +170,92 @@ class PullRequestReviewer(Base):
         'PullRequest',
         back_populates='reviewer_associations',
         lazy='selectin'
-    )
\ No newline at end of file
+    )
+
+
+class PullRequestArchive(Base):
+    __tablename__ = 'pull_requests_archive'
+    __table_args__ = (
+        Index('ix_pull_requests_archive_created_at_id', 'created_at', 'id'),
+        Index('ix_pull_requests_archive_author_pk_created_at_id', 'author_pk', 'created_at', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    pull_request_id: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    pull_request_name: Mapped[str] = mapped_column(String, nullable=False)
+
+    status: Mapped[PRStatus] = mapped_column(
+        Enum(PRStatus, name='pr_status_enum'),
+        nullable=False
+    )
+
+    author_pk: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('users.id'),
+        nullable=False
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False
+    )
+    merged_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True
+    )
+
+
+class PullRequestReviewerArchive(Base):
+    __tablename__ = 'pull_request_reviewers_archive'
+    __table_args__ = (
+        Index('ix_pull_request_reviewers_archive_pull_request_pk', 'pull_request_pk'),
+    )
+
+    user_pk: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('users.id'),
+        primary_key=True
+    )
+    pull_request_pk: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('pull_requests_archive.id'),
+        primary_key=True
+    )
+
+
+class ReviewEvent(Base):
+    __tablename__ = 'review_events'
+    __table_args__ = (
+        Index('ix_review_events_user_pk_xid_id', 'user_pk', 'xid', 'id'),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    user_pk: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey('users.id'),
+        nullable=False
+    )
+    # Writing transaction: ids are handed out at insert but become visible at commit, so they are not a cursor
+    xid: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text('pg_current_xact_id()::text::bigint'),
+        nullable=False
+    )
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+
+class RateLimitBucket(Base):
+    __tablename__ = 'rate_limit_buckets'
+    __table_args__ = {'prefixes': ['UNLOGGED']}
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False
+    )
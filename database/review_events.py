@@ -0,0 +1,180 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+import asyncpg
+
+from config import POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_IP, POSTGRES_PORT, POSTGRES_DB
+
+
+REVIEW_EVENTS_CHANNEL = 'review_events'
+
+RESYNC = {'kind': 'resync'}
+CLOSED = {'kind': 'closed'}
+
+logger = logging.getLogger(__name__)
+
+
+class EventCursor:
+    # Every event written by a transaction below the horizon has been delivered, above it only the seen ones
+    __slots__ = ('horizon', 'seen')
+
+    def __init__(self, horizon: int, seen: Optional[Dict[int, int]] = None):
+        self.horizon = horizon
+        self.seen = seen or {}
+
+    @classmethod
+    def parse(cls, value: str) -> 'EventCursor':
+        if not (value.isascii() and value.isdigit()):
+            raise ValueError(value)
+        return cls(int(value))
+
+    def __str__(self) -> str:
+        return str(self.horizon)
+
+    def accept(self, event: dict) -> bool:
+        if event['xid'] < self.horizon or event['id'] in self.seen:
+            return False
+        self.seen[event['id']] = event['xid']
+        return True
+
+    def advance(self, horizon: int) -> bool:
+        if horizon <= self.horizon:
+            return False
+        self.horizon = horizon
+        self.seen = {event_id: xid for event_id, xid in self.seen.items() if xid >= horizon}
+        return True
+
+
+async def connect_listener() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        user=POSTGRES_USER,
+        password=POSTGRES_PASSWORD,
+        host=POSTGRES_IP,
+        port=POSTGRES_PORT,
+        database=POSTGRES_DB
+    )
+
+
+class ReviewEventHub:
+    def __init__(
+            self,
+            connect: Callable[[], Awaitable[asyncpg.Connection]] = connect_listener,
+            queue_size: int = 100,
+            max_streams: int = 1000,
+            ping_interval: float = 15.0,
+            replay_concurrency: int = 2
+    ):
+        self.connect = connect
+        self.queue_size = queue_size
+        self.max_streams = max_streams
+        self.ping_interval = ping_interval
+        self.replay_concurrency = replay_concurrency
+        # Streams replay from the table together after every listener reconnect, this keeps them off the pool
+        self.replays = asyncio.Semaphore(replay_concurrency)
+        self.subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self.streams = 0
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.closed = False
+
+    @property
+    def full(self) -> bool:
+        return self.closed or self.streams >= self.max_streams
+
+    def subscribe(self, user_id: str) -> Optional[asyncio.Queue]:
+        if self.full:
+            return None
+
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers[user_id].add(queue)
+        self.streams += 1
+
+        if self.task is None or self.task.done():
+            self.loop = asyncio.get_running_loop()
+            self.replays = asyncio.Semaphore(self.replay_concurrency)
+            self.task = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self.subscribers.get(user_id)
+        if not queues or queue not in queues:
+            return
+
+        queues.discard(queue)
+        self.streams -= 1
+        if not queues:
+            del self.subscribers[user_id]
+
+    def _close_streams(self) -> None:
+        self.closed = True
+        self._broadcast(CLOSED)
+
+    def close_streams_soon(self) -> None:
+        # Safe to call from a signal handler, streams end before the server waits for connections to close
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._close_streams)
+
+    async def close(self) -> None:
+        self._close_streams()
+
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    @staticmethod
+    def _put(queue: asyncio.Queue, event: dict) -> None:
+        if event is CLOSED or queue.full():
+            # A stream that cannot keep up drops its buffer and replays from the table instead
+            while not queue.empty():
+                queue.get_nowait()
+            if event is not CLOSED:
+                event = RESYNC
+        queue.put_nowait(event)
+
+    def _broadcast(self, event: dict) -> None:
+        for queues in self.subscribers.values():
+            for queue in queues:
+                self._put(queue, event)
+
+    def _dispatch(self, connection, pid, channel, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+            user_id = event['user_id']
+        except (ValueError, TypeError, KeyError):
+            logger.warning('Skipping malformed review event: %r', payload)
+            return
+
+        for queue in self.subscribers.get(user_id, ()):
+            self._put(queue, event)
+
+    async def _listen(self) -> None:
+        delay = 0.1
+        while not self.closed:
+            connection = None
+            try:
+                connection = await self.connect()
+                await connection.add_listener(REVIEW_EVENTS_CHANNEL, self._dispatch)
+                # Anything committed while (re)connecting was not delivered, streams catch up from the table
+                self._broadcast(RESYNC)
+                delay = 0.1
+
+                while True:
+                    await asyncio.sleep(self.ping_interval)
+                    await connection.execute('SELECT 1')
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as _e:
+                logger.warning('Review event listener disconnected, retrying in %.1fs: %s', delay, _e)
+            except Exception:
+                # Streams would silently stop receiving events if the listener died, so it always reconnects
+                logger.exception('Review event listener failed, retrying in %.1fs', delay)
+            finally:
+                if connection is not None:
+                    connection.terminate()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
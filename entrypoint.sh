@@ -1,13 +1,7 @@
 #!/bin/sh
 
-echo "Waiting for postgres..."
-while ! nc -z db 5432; do
-  sleep 0.1
-done
-echo "PostgreSQL started"
-
-echo "Running database migrations..."
-alembic upgrade head
+echo "Checking database schema..."
+python -m scripts.migrate || exit 1
 
 echo "Starting API server..."
-uvicorn app:app --host 0.0.0.0 --port ${API_PORT}
\ No newline at end of file
+exec uvicorn app:app --host 0.0.0.0 --port ${API_PORT} --timeout-graceful-shutdown ${SHUTDOWN_DRAIN_TIMEOUT:-25}
@@ -0,0 +1,13 @@
+from .in_flight import InFlightTracker, InFlightMiddleware, in_flight
+from .deadline import DeadlineMiddleware
+from .load_shedding import LoadSheddingMiddleware
+from .metrics import Metrics, metrics
+from .rate_limit import MemoryTokenBuckets, PostgresTokenBuckets, RateLimitMiddleware
+from .request_context import RequestContextMiddleware
+from .profiling import ProfilingMiddleware
+from .compression import CompressionMiddleware
+
+
+__all__ = ['InFlightTracker', 'InFlightMiddleware', 'in_flight', 'DeadlineMiddleware', 'LoadSheddingMiddleware',
+           'Metrics', 'metrics', 'MemoryTokenBuckets', 'PostgresTokenBuckets', 'RateLimitMiddleware',
+           'RequestContextMiddleware', 'ProfilingMiddleware', 'CompressionMiddleware']
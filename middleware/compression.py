@@ -0,0 +1,68 @@
+from typing import Dict
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import IdentityResponder, GZipResponder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    encodings = {}
+    for item in filter(None, (part.strip() for part in header.lower().split(','))):
+        name, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[name.strip()] = quality
+    return encodings
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = 'br'
+
+    def __init__(self, app, minimum_size: int, quality: int = 4):
+        super().__init__(app, minimum_size)
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        # Streamed chunks are flushed so every message reaches the client as it is produced
+        if more_body:
+            return self.compressor.process(body) + self.compressor.flush()
+        return self.compressor.process(body) + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def encoding(self, scope) -> str:
+        accepted = accepted_encodings(Headers(scope=scope).get('accept-encoding', ''))
+        # Server preference breaks ties between equally weighted encodings
+        best = max(self.encodings, key=lambda name: accepted.get(name, accepted.get('*', 0.0)))
+        return best if accepted.get(best, accepted.get('*', 0.0)) > 0 else 'identity'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        encoding = self.encoding(scope)
+        if encoding == 'br':
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif encoding == 'gzip':
+            responder = GZipResponder(self.app, self.minimum_size, self.gzip_level)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+
+        await responder(scope, receive, send)
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Dict, Optional
+
+from starlette.responses import JSONResponse
+from starlette.status import HTTP_504_GATEWAY_TIMEOUT
+
+from middleware.metrics import metrics, route_label
+
+
+class DeadlineMiddleware:
+    def __init__(self, app, default_timeout: Optional[float], route_timeouts: Optional[Dict[str, float]] = None):
+        self.app = app
+        self.default_timeout = default_timeout
+        self.route_timeouts = route_timeouts or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        timeout = self.route_timeouts.get(scope['path'], self.default_timeout)
+        if not timeout:
+            return await self.app(scope, receive, send)
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await asyncio.wait_for(self.app(scope, receive, send_wrapper), timeout)
+        except asyncio.TimeoutError:
+            metrics.inc('requests_timed_out_total', path=route_label(scope))
+            if response_started:
+                return
+
+            response = JSONResponse(
+                {"detail": {"error": {"code": "TIMEOUT", "message": f"Request exceeded {timeout:g}s deadline"}}},
+                status_code=HTTP_504_GATEWAY_TIMEOUT
+            )
+            await response(scope, receive, send)
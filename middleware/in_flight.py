@@ -0,0 +1,32 @@
+from middleware.metrics import metrics
+
+
+class InFlightTracker:
+    def __init__(self):
+        self.count = 0
+
+    def enter(self) -> None:
+        self.count += 1
+
+    def exit(self) -> None:
+        self.count -= 1
+
+
+class InFlightMiddleware:
+    def __init__(self, app, tracker: InFlightTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        self.tracker.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.exit()
+
+
+in_flight = InFlightTracker()
+metrics.gauge('requests_in_flight', lambda: in_flight.count)
@@ -0,0 +1,41 @@
+from typing import Sequence
+
+from starlette.responses import JSONResponse
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+
+from middleware.metrics import metrics, route_label
+
+
+class LoadSheddingMiddleware:
+    def __init__(
+            self,
+            app,
+            max_in_flight: int,
+            retry_after: int,
+            exempt_prefixes: Sequence[str] = ('/health',)
+    ):
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.exempt_prefixes = tuple(exempt_prefixes)
+        self.in_flight = 0
+        metrics.gauge('requests_admitted_in_flight', lambda: self.in_flight)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.max_in_flight or scope['path'].startswith(self.exempt_prefixes):
+            return await self.app(scope, receive, send)
+
+        if self.in_flight >= self.max_in_flight:
+            metrics.inc('requests_shed_total', path=route_label(scope))
+            response = JSONResponse(
+                {"detail": {"error": {"code": "OVERLOADED", "message": "Too many requests in flight, retry later"}}},
+                status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(self.retry_after)}
+            )
+            return await response(scope, receive, send)
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -0,0 +1,40 @@
+from collections import defaultdict
+from typing import Callable, Dict, Set, Tuple
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        self.counters[(name, tuple(sorted(labels.items())))] += value
+
+    def gauge(self, name: str, getter: Callable[[], float]) -> None:
+        self.gauges[name] = getter
+
+    def render(self) -> str:
+        lines = []
+        for (name, labels), value in sorted(self.counters.items()):
+            label_str = ','.join(f'{key}="{val}"' for key, val in labels)
+            lines.append(f'{name}{{{label_str}}} {value:g}' if label_str else f'{name} {value:g}')
+        for name, getter in sorted(self.gauges.items()):
+            lines.append(f'{name} {getter():g}')
+        return '\n'.join(lines) + '\n'
+
+
+_route_paths: Dict[int, Set[str]] = {}
+
+
+def route_label(scope) -> str:
+    app = scope.get('app')
+    if app is None:
+        return 'other'
+
+    paths = _route_paths.get(id(app))
+    if paths is None:
+        paths = _route_paths[id(app)] = {getattr(route, 'path', None) for route in app.router.routes}
+    return scope['path'] if scope['path'] in paths else 'other'
+
+
+metrics = Metrics()
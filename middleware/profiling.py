@@ -0,0 +1,67 @@
+import asyncio
+import hmac
+import logging
+import random
+import time
+import uuid
+
+from telemetry.profiling import ProfileStore, RequestProfiler, TaskSampler
+
+
+logger = logging.getLogger('api.profiling')
+
+
+class ProfilingMiddleware:
+    def __init__(
+            self,
+            app,
+            store: ProfileStore,
+            header: str = 'X-Profile',
+            token: str = '',
+            sample_rate: float = 0.0,
+            interval: float = 0.001,
+            exempt_prefixes: tuple = ('/debug/',)
+    ):
+        self.app = app
+        self.store = store
+        self.header = header.lower().encode('latin-1')
+        self.token = token.encode('latin-1')
+        self.exempt_prefixes = exempt_prefixes
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.sampler = TaskSampler(interval)
+
+    def requested(self, scope) -> bool:
+        if scope['path'].startswith(self.exempt_prefixes):
+            return False
+        # Without a configured token the header is ignored, only server-side sampling applies
+        for name, value in scope['headers']:
+            if name == self.header and self.token:
+                return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.requested(scope):
+            return await self.app(scope, receive, send)
+
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                message['headers'] = [*message.get('headers', []), (b'x-profile-id', profile_id.encode('latin-1'))]
+            await send(message)
+
+        profiler = RequestProfiler(self.sampler, self.interval)
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            extension, content = profiler.stop()
+            duration_ms = (time.perf_counter() - started) * 1000
+            path = await asyncio.to_thread(self.store.save, profile_id, extension, content)
+            logger.info(
+                'Profile saved',
+                extra={'profile_id': profile_id, 'path': scope['path'], 'file': path,
+                       'duration_ms': round(duration_ms, 2)}
+            )
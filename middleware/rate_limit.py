@@ -0,0 +1,107 @@
+import math
+import time
+from typing import Callable, Dict, Tuple
+
+from sqlalchemy import text
+from starlette.responses import JSONResponse
+from starlette.status import HTTP_429_TOO_MANY_REQUESTS
+
+from middleware.metrics import metrics, route_label
+
+
+class MemoryTokenBuckets:
+    def __init__(self, max_buckets: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.buckets: Dict[str, list] = {}
+
+    def _prune(self, now: float) -> None:
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if bucket[2] > now}
+
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        now = self.clock()
+        bucket = self.buckets.get(key)
+
+        if bucket is None:
+            if len(self.buckets) >= self.max_buckets:
+                self._prune(now)
+            bucket = self.buckets[key] = [burst, now, now]
+
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        bucket[:] = tokens, now, now + (burst - tokens) / rate
+        return retry_after
+
+
+class PostgresTokenBuckets:
+    ACQUIRE = text("""
+        INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+        VALUES (:key, :burst - 1, clock_timestamp())
+        ON CONFLICT (key) DO UPDATE SET
+            tokens = LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) - 1,
+            updated_at = clock_timestamp()
+        WHERE LEAST(:burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * :rate) >= 1
+        RETURNING tokens
+    """)
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def acquire(self, key: str, rate: float, burst: float) -> float:
+        async with self.engine.begin() as connection:
+            result = await connection.execute(self.ACQUIRE, {'key': key, 'rate': rate, 'burst': burst})
+            if result.first() is not None:
+                return 0.0
+
+        return 1 / rate
+
+
+class RateLimitMiddleware:
+    def __init__(
+            self,
+            app,
+            limits: Dict[str, Tuple[float, float]],
+            backend,
+            client_header: str = 'X-Client-Id'
+    ):
+        self.app = app
+        self.limits = limits
+        self.backend = backend
+        self.client_header = client_header.lower().encode('latin-1')
+
+    def client_key(self, scope) -> str:
+        for name, value in scope['headers']:
+            if name == self.client_header and value:
+                return 'client:' + value.decode('latin-1')
+
+        client = scope.get('client')
+        return 'ip:' + (client[0] if client else 'unknown')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in self.limits:
+            return await self.app(scope, receive, send)
+
+        rate, burst = self.limits[scope['path']]
+        key = f"{self.client_key(scope)}:{scope['path']}"
+
+        try:
+            retry_after = await self.backend.acquire(key, rate, burst)
+        except Exception:
+            metrics.inc('rate_limit_errors_total', path=route_label(scope))
+            retry_after = 0.0
+
+        if not retry_after:
+            return await self.app(scope, receive, send)
+
+        metrics.inc('requests_rate_limited_total', path=route_label(scope))
+        response = JSONResponse(
+            {"detail": {"error": {"code": "RATE_LIMITED", "message": "Rate limit exceeded, retry later"}}},
+            status_code=HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(max(1, math.ceil(retry_after)))}
+        )
+        await response(scope, receive, send)
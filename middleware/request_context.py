@@ -0,0 +1,61 @@
+import logging
+import random
+import time
+import uuid
+
+from telemetry import RequestContext, request_context
+
+
+logger = logging.getLogger('api.access')
+
+
+class RequestContextMiddleware:
+    def __init__(self, app, sample_rate: float = 1.0, slow_request_ms: float = 500, header: str = 'X-Request-Id'):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_request_ms = slow_request_ms
+        self.header = header.lower().encode('latin-1')
+
+    def request_id(self, scope) -> str:
+        for name, value in scope['headers']:
+            if name == self.header and value:
+                return value.decode('latin-1')[:128]
+        return uuid.uuid4().hex
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        context = RequestContext(self.request_id(scope))
+        token = request_context.set(context)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                message['headers'] = [*message.get('headers', []), (self.header, context.request_id.encode('latin-1'))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            logger.exception('Unhandled exception', extra={'method': scope['method'], 'path': scope['path']})
+            raise
+        finally:
+            duration_ms = (time.perf_counter() - started) * 1000
+            if status_code >= 500 or duration_ms >= self.slow_request_ms or random.random() < self.sample_rate:
+                logger.log(
+                    logging.WARNING if status_code >= 500 or duration_ms >= self.slow_request_ms else logging.INFO,
+                    'Request finished',
+                    extra={
+                        'method': scope['method'],
+                        'path': scope['path'],
+                        'status': status_code,
+                        'duration_ms': round(duration_ms, 2),
+                        'db_queries': context.db_queries,
+                        'db_time_ms': round(context.db_time * 1000, 2),
+                    }
+                )
+            request_context.reset(token)
@@ -0,0 +1,48 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, REVIEW_EVENTS_RETENTION_DAYS
+from database.crud.pull_request_crud import PullRequestCrud
+from database.crud.review_event_crud import ReviewEventCrud
+from database.gen_session import SessionLocal, engine
+
+
+async def archive(older_than_days: int, batch_size: int, events_retention_days: int):
+    now = datetime.now(timezone.utc)
+    merged_before = now - timedelta(days=older_than_days)
+    total = 0
+
+    try:
+        while True:
+            async with SessionLocal() as session:
+                async with session.begin():
+                    moved = await PullRequestCrud.archive_merged(session, merged_before, batch_size)
+
+            total += moved
+            if moved < batch_size:
+                break
+
+        async with SessionLocal() as session:
+            async with session.begin():
+                pruned = await ReviewEventCrud.prune(session, now - timedelta(days=events_retention_days))
+
+        return total, pruned
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move merged pull requests older than N days to the archive tables')
+    parser.add_argument('--older-than-days', type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument('--batch-size', type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument('--events-retention-days', type=int, default=REVIEW_EVENTS_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    total, pruned = asyncio.run(archive(args.older_than_days, args.batch_size, args.events_retention_days))
+    print(f'Archived {total} pull requests merged more than {args.older_than_days} days ago')
+    print(f'Pruned {pruned} review events older than {args.events_retention_days} days')
+
+
+if __name__ == '__main__':
+    main()
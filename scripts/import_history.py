@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database.gen_session import engine
+
+
+STAGING_TABLES = {
+    'teams': ('import_teams', ['team_name']),
+    'users': ('import_users', ['user_id', 'username', 'team_name', 'is_active']),
+    'pull_requests': (
+        'import_pull_requests',
+        ['pull_request_id', 'pull_request_name', 'author_id', 'status', 'created_at', 'merged_at']
+    ),
+    'reviewers': ('import_reviewers', ['pull_request_id', 'user_id']),
+}
+
+VALIDATIONS = [
+    ('users without user_id, username or team_name', '''
+        SELECT coalesce(user_id, '?') FROM import_users
+        WHERE user_id IS NULL OR username IS NULL OR team_name IS NULL
+    '''),
+    ('duplicate user_id', '''
+        SELECT user_id FROM import_users GROUP BY user_id HAVING count(*) > 1
+    '''),
+    ('invalid is_active', '''
+        SELECT user_id FROM import_users
+        WHERE is_active IS NOT NULL AND NOT pg_input_is_valid(is_active, 'boolean')
+    '''),
+    ('pull requests without pull_request_id, pull_request_name or author_id', '''
+        SELECT coalesce(pull_request_id, '?') FROM import_pull_requests
+        WHERE pull_request_id IS NULL OR pull_request_name IS NULL OR author_id IS NULL
+    '''),
+    ('duplicate pull_request_id', '''
+        SELECT pull_request_id FROM import_pull_requests GROUP BY pull_request_id HAVING count(*) > 1
+    '''),
+    ('invalid status', '''
+        SELECT pull_request_id FROM import_pull_requests
+        WHERE status IS NOT NULL AND status NOT IN ('OPEN', 'MERGED')
+    '''),
+    ('invalid created_at or merged_at', '''
+        SELECT pull_request_id FROM import_pull_requests
+        WHERE (created_at IS NOT NULL AND NOT pg_input_is_valid(created_at, 'timestamptz'))
+           OR (merged_at IS NOT NULL AND NOT pg_input_is_valid(merged_at, 'timestamptz'))
+    '''),
+    ('merged pull requests without merged_at', '''
+        SELECT pull_request_id FROM import_pull_requests WHERE status = 'MERGED' AND merged_at IS NULL
+    '''),
+    ('unknown author_id', '''
+        SELECT p.pull_request_id FROM import_pull_requests p
+        WHERE NOT EXISTS (SELECT 1 FROM import_users u WHERE u.user_id = p.author_id)
+          AND NOT EXISTS (SELECT 1 FROM users u WHERE u.user_id = p.author_id)
+    '''),
+    ('pull_request_id already archived', '''
+        SELECT p.pull_request_id FROM import_pull_requests p
+        JOIN pull_requests_archive a ON a.pull_request_id = p.pull_request_id
+    '''),
+    ('reviewers without pull_request_id or user_id', '''
+        SELECT coalesce(pull_request_id, '?') FROM import_reviewers
+        WHERE pull_request_id IS NULL OR user_id IS NULL
+    '''),
+    ('duplicate reviewer assignment', '''
+        SELECT pull_request_id || '/' || user_id FROM import_reviewers
+        GROUP BY pull_request_id, user_id HAVING count(*) > 1
+    '''),
+    ('reviewers of unknown pull requests', '''
+        SELECT r.pull_request_id FROM import_reviewers r
+        WHERE NOT EXISTS (SELECT 1 FROM import_pull_requests p WHERE p.pull_request_id = r.pull_request_id)
+          AND NOT EXISTS (SELECT 1 FROM pull_requests p WHERE p.pull_request_id = r.pull_request_id)
+    '''),
+    ('unknown reviewer user_id', '''
+        SELECT r.user_id FROM import_reviewers r
+        WHERE NOT EXISTS (SELECT 1 FROM import_users u WHERE u.user_id = r.user_id)
+          AND NOT EXISTS (SELECT 1 FROM users u WHERE u.user_id = r.user_id)
+    '''),
+    ('author assigned as reviewer', '''
+        SELECT r.pull_request_id FROM import_reviewers r
+        JOIN import_pull_requests p ON p.pull_request_id = r.pull_request_id AND p.author_id = r.user_id
+    '''),
+    ('more than 2 reviewers per pull request', '''
+        SELECT pull_request_id FROM import_reviewers GROUP BY pull_request_id HAVING count(*) > 2
+    '''),
+]
+
+MERGES = [
+    ('teams', '''
+        INSERT INTO teams (team_name)
+        SELECT team_name FROM import_teams WHERE team_name IS NOT NULL
+        UNION
+        SELECT team_name FROM import_users
+        ON CONFLICT DO NOTHING
+    '''),
+    ('users', '''
+        INSERT INTO users (user_id, username, team_pk, is_active)
+        SELECT i.user_id, i.username, t.id, coalesce(i.is_active::boolean, true)
+        FROM import_users i
+        JOIN teams t ON t.team_name = i.team_name
+        ON CONFLICT DO NOTHING
+    '''),
+    ('pull_requests', '''
+        INSERT INTO pull_requests (pull_request_id, pull_request_name, author_pk, status, created_at, merged_at)
+        SELECT i.pull_request_id, i.pull_request_name, u.id, coalesce(i.status, 'OPEN')::pr_status_enum,
+               coalesce(i.created_at::timestamptz, now()), i.merged_at::timestamptz
+        FROM import_pull_requests i
+        JOIN users u ON u.user_id = i.author_id
+        ON CONFLICT DO NOTHING
+    '''),
+    ('pull_request_reviewers', '''
+        INSERT INTO pull_request_reviewers (pull_request_pk, user_pk)
+        SELECT p.id, u.id
+        FROM import_reviewers i
+        JOIN pull_requests p ON p.pull_request_id = i.pull_request_id
+        JOIN users u ON u.user_id = i.user_id
+        ON CONFLICT DO NOTHING
+    '''),
+]
+
+
+class ImportValidationError(Exception):
+    def __init__(self, errors: List[Tuple[str, int, List[str]]]):
+        self.errors = errors
+        super().__init__('; '.join(f'{name}: {count}' for name, count, _ in errors))
+
+
+class _DryRun(Exception):
+    def __init__(self, inserted: Dict[str, int]):
+        self.inserted = inserted
+
+
+def _text(value) -> Optional[str]:
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def read_records(path: str, columns: List[str]) -> Iterator[Tuple[Optional[str], ...]]:
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    yield tuple(_text(row.get(column)) for column in columns)
+        else:
+            for row in csv.DictReader(f):
+                yield tuple(_text(row.get(column)) for column in columns)
+
+
+async def _copy(connection, table: str, columns: List[str], path: str, batch_size: int) -> int:
+    records = read_records(path, columns)
+    total = 0
+    while batch := list(islice(records, batch_size)):
+        await connection.copy_records_to_table(table, records=batch, columns=columns)
+        total += len(batch)
+    return total
+
+
+async def import_history(
+        files: Dict[str, str],
+        batch_size: int,
+        dry_run: bool = False,
+        skip_fk_checks: bool = False
+) -> Dict[str, int]:
+    try:
+        async with engine.connect() as sa_connection:
+            raw_connection = await sa_connection.get_raw_connection()
+            connection = raw_connection.driver_connection
+
+            async with connection.transaction():
+                for table, columns in STAGING_TABLES.values():
+                    await connection.execute(
+                        f'CREATE TEMP TABLE {table} ({", ".join(f"{column} text" for column in columns)}) '
+                        f'ON COMMIT DROP'
+                    )
+
+                started = time.perf_counter()
+                copied = 0
+                for kind, path in files.items():
+                    table, columns = STAGING_TABLES[kind]
+                    rows = await _copy(connection, table, columns, path, batch_size)
+                    copied += rows
+                    print(f'Copied {rows} {kind} from {path}')
+                    await connection.execute(f'ANALYZE {table}')
+                elapsed = time.perf_counter() - started
+                print(f'Staged {copied} rows in {elapsed:.2f}s ({copied / max(elapsed, 1e-9):.0f} rows/s)')
+
+                errors = []
+                for name, query in VALIDATIONS:
+                    count, samples = await connection.fetchrow(
+                        f'SELECT count(*), (array_agg(key))[1:5] FROM ({query}) AS failed (key)'
+                    )
+                    if count:
+                        errors.append((name, count, samples))
+                if errors:
+                    raise ImportValidationError(errors)
+
+                # Historical assignments must not reach live review event streams
+                await connection.execute("SET LOCAL app.skip_review_events = 'on'")
+                if skip_fk_checks:
+                    await connection.execute('SET LOCAL session_replication_role = replica')
+
+                inserted = {}
+                for table, query in MERGES:
+                    status = await connection.execute(query)
+                    inserted[table] = int(status.rsplit(' ', 1)[-1])
+
+                if dry_run:
+                    raise _DryRun(inserted)
+
+            return inserted
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Import historical teams, users, pull requests and reviewer assignments (CSV or NDJSON) '
+                    'through COPY into staging tables, validate them and merge in one transaction'
+    )
+    parser.add_argument('--teams')
+    parser.add_argument('--users')
+    parser.add_argument('--pull-requests')
+    parser.add_argument('--reviewers')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Records per COPY call')
+    parser.add_argument('--dry-run', action='store_true', help='Validate and merge, then roll back')
+    parser.add_argument(
+        '--skip-fk-checks',
+        action='store_true',
+        help='Skip per-row foreign key triggers during the merge (superuser only, integrity is validated in SQL)'
+    )
+    args = parser.parse_args()
+
+    files = {kind: getattr(args, kind) for kind in STAGING_TABLES if getattr(args, kind)}
+    if not files:
+        parser.error('at least one of --teams, --users, --pull-requests, --reviewers is required')
+
+    started = time.perf_counter()
+    try:
+        inserted = asyncio.run(import_history(files, args.batch_size, args.dry_run, args.skip_fk_checks))
+    except ImportValidationError as _e:
+        for name, count, samples in _e.errors:
+            print(f'{name}: {count} (e.g. {", ".join(samples)})', file=sys.stderr)
+        print('Import aborted, nothing was written', file=sys.stderr)
+        sys.exit(1)
+    except _DryRun as _d:
+        inserted = _d.inserted
+        print('Dry run, rolled back')
+
+    for table, count in inserted.items():
+        print(f'{table}: {count} inserted')
+    print(f'Import finished [{time.perf_counter() - started:.2f}s]')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import sys
+import time
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from asyncpg import CannotConnectNowError
+from sqlalchemy.exc import OperationalError
+
+from config import DB_STARTUP_TIMEOUT
+from database.gen_session import engine
+
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'alembic.ini')
+
+
+async def current_revision(timeout: float):
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+
+    try:
+        while True:
+            try:
+                async with engine.connect() as connection:
+                    return await connection.run_sync(
+                        lambda sync_connection: MigrationContext.configure(sync_connection).get_current_revision()
+                    )
+            # CannotConnectNowError: the server accepts connections but is still starting up or recovering
+            except (OSError, ConnectionError, CannotConnectNowError, OperationalError) as _e:
+                if time.monotonic() + delay > deadline:
+                    raise TimeoutError(f'Database is not reachable after {timeout}s: {_e}')
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 1.0)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    started = time.perf_counter()
+    config = Config(ALEMBIC_INI)
+    head = ScriptDirectory.from_config(config).get_current_head()
+
+    try:
+        current = asyncio.run(current_revision(DB_STARTUP_TIMEOUT))
+    except TimeoutError as _e:
+        print(_e, file=sys.stderr)
+        sys.exit(1)
+
+    if current == head:
+        print(f'Schema is up to date ({head}), skipping migrations [{time.perf_counter() - started:.3f}s]')
+        return
+
+    print(f'Upgrading schema {current} -> {head}')
+    command.upgrade(config, 'head')
+    print(f'Migrations finished [{time.perf_counter() - started:.3f}s]')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+import argparse
+import csv
+import heapq
+import json
+import random
+import sys
+import time
+from array import array
+from statistics import mean, pstdev, quantiles
+
+from assignment import Candidate, review_weight, weighted_sample, select_replacement
+
+
+WEIGHTS = {
+    'inverse': review_weight,
+    'inverse-square': lambda open_count: 1 / (1 + open_count) ** 2,
+    'uniform': lambda open_count: 1.0,
+}
+
+
+class AssignmentModel:
+    def __init__(self, roster, weight, review_hours=None, seed=None):
+        self.user_ids = sorted({user_id for members in roster.values() for user_id in members})
+        self.index = {user_id: idx for idx, user_id in enumerate(self.user_ids)}
+        self.team_names = sorted(roster)
+
+        size = len(self.user_ids)
+        self.team_of = array('l', [0] * size)
+        self.members = []
+        for team_idx, team_name in enumerate(self.team_names):
+            member_idxs = array('l', sorted(self.index[user_id] for user_id in roster[team_name]))
+            for idx in member_idxs:
+                self.team_of[idx] = team_idx
+            self.members.append(member_idxs)
+
+        self.load = array('l', [0] * size)
+        self.active = bytearray([1]) * size
+        self.changed_at = array('d', [0.0] * size)
+        self.busy_until = array('d', [0.0] * size)
+        self.histograms = [array('d') for _ in range(size)]
+        self.reviews = [set() for _ in range(size)]
+
+        self.open_prs = {}
+        self.queue_times = array('d')
+        self.weight = weight
+        self.review_hours = review_hours
+        self.rng = random.Random(seed)
+        self.now = 0.0
+
+    def _set_load(self, idx, delta):
+        hist = self.histograms[idx]
+        old = self.load[idx]
+        if old >= len(hist):
+            hist.extend([0.0] * (old + 1 - len(hist)))
+        hist[old] += self.now - self.changed_at[idx]
+        self.changed_at[idx] = self.now
+        self.load[idx] = old + delta
+
+    def _review_done_at(self, idx):
+        start = max(self.now, self.busy_until[idx])
+        self.busy_until[idx] = start + self.rng.expovariate(1 / self.review_hours)
+        return self.busy_until[idx]
+
+    def _assign(self, idx, pr_id):
+        self.reviews[idx].add(pr_id)
+        self._set_load(idx, 1)
+        if self.review_hours is None:
+            return self.now
+        return self._review_done_at(idx)
+
+    def _unassign(self, idx, pr_id):
+        self.reviews[idx].discard(pr_id)
+        self._set_load(idx, -1)
+
+    def create(self, pr_id, author_id):
+        author = self.index.get(author_id)
+        if author is None or not self.active[author] or pr_id in self.open_prs:
+            return None
+
+        pool = [idx for idx in self.members[self.team_of[author]] if idx != author and self.active[idx]]
+        picked = weighted_sample([self.load[idx] for idx in pool], weight=self.weight)
+        reviewers = [pool[pos] for pos in picked]
+
+        done_at = self.now
+        for idx in reviewers:
+            done_at = max(done_at, self._assign(idx, pr_id))
+
+        self.open_prs[pr_id] = [self.now, reviewers, done_at, author]
+        return done_at
+
+    def merge(self, pr_id, done_at=None):
+        pr = self.open_prs.get(pr_id)
+        if pr is None or (done_at is not None and pr[2] != done_at):
+            return
+
+        created_at, reviewers, _, _ = self.open_prs.pop(pr_id)
+        for idx in reviewers:
+            self._unassign(idx, pr_id)
+        self.queue_times.append(self.now - created_at)
+
+    def deactivate(self, user_id):
+        idx = self.index.get(user_id)
+        if idx is None or not self.active[idx]:
+            return []
+        self.active[idx] = False
+
+        rescheduled = []
+        for pr_id in sorted(self.reviews[idx]):
+            pr = self.open_prs[pr_id]
+            reviewers = pr[1]
+            reviewers.remove(idx)
+            self._unassign(idx, pr_id)
+
+            taken = {pr[3], *reviewers}
+            candidate = select_replacement(
+                Candidate(self.user_ids[member], self.load[member]) for member in self.members[self.team_of[idx]]
+                if self.active[member] and member not in taken
+            )
+            if candidate is None:
+                continue
+            replacement = self.index[candidate.user_id]
+
+            reviewers.append(replacement)
+            pr[2] = max(pr[2], self._assign(replacement, pr_id))
+            rescheduled.append((pr_id, pr[2]))
+
+        return rescheduled
+
+    def activate(self, user_id):
+        idx = self.index.get(user_id)
+        if idx is not None:
+            self.active[idx] = True
+
+    def finish(self):
+        for idx in range(len(self.user_ids)):
+            self._set_load(idx, 0)
+
+
+def load_roster(path, teams, team_size):
+    if path:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    return {
+        f'team_{t}': [f'team_{t}_user_{u}' for u in range(team_size)]
+        for t in range(teams)
+    }
+
+
+def read_events(path):
+    with (sys.stdin if path == '-' else open(path, encoding='utf-8')) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            kind = event['event']
+            if kind == 'create':
+                yield float(event['t']), kind, event['pull_request_id'], event['author_id']
+            elif kind == 'merge':
+                yield float(event['t']), kind, event['pull_request_id'], None
+            else:
+                yield float(event['t']), kind, event['user_id'], None
+
+
+def synthetic_events(roster, count, creates_per_hour, churn_per_day, leave_days, seed):
+    rng = random.Random(seed)
+    user_ids = sorted({user_id for members in roster.values() for user_id in members})
+    churn_per_hour = churn_per_day / 24
+    rate = creates_per_hour + churn_per_hour
+
+    returns = []
+    now = 0.0
+    emitted = 0
+    pr_seq = 0
+    while emitted < count:
+        now += rng.expovariate(rate)
+        while returns and returns[0][0] <= now and emitted < count:
+            t, user_id = heapq.heappop(returns)
+            yield t, 'activate', user_id, None
+            emitted += 1
+
+        if rng.random() * rate < creates_per_hour:
+            yield now, 'create', f'pr_{pr_seq}', rng.choice(user_ids)
+            pr_seq += 1
+        else:
+            user_id = rng.choice(user_ids)
+            yield now, 'deactivate', user_id, None
+            heapq.heappush(returns, (now + rng.expovariate(1 / (leave_days * 24)), user_id))
+        emitted += 1
+
+
+def replay(model, events, simulate_merges):
+    merges = []
+    processed = 0
+    for t, kind, a, b in events:
+        while merges and merges[0][0] <= t:
+            done_at, pr_id = heapq.heappop(merges)
+            model.now = done_at
+            model.merge(pr_id, done_at)
+
+        model.now = t
+        if kind == 'create':
+            done_at = model.create(a, b)
+            if simulate_merges and done_at is not None:
+                heapq.heappush(merges, (done_at, a))
+        elif kind == 'merge':
+            if not simulate_merges:
+                model.merge(a)
+        elif kind == 'deactivate':
+            for pr_id, done_at in model.deactivate(a):
+                if simulate_merges:
+                    heapq.heappush(merges, (done_at, pr_id))
+        elif kind == 'activate':
+            model.activate(a)
+        processed += 1
+
+    model.finish()
+    return processed
+
+
+def write_histograms(model, path):
+    width = max(len(hist) for hist in model.histograms)
+    with (sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')) as f:
+        writer = csv.writer(f)
+        writer.writerow(['user_id', 'team_name', *(f'load_{load}' for load in range(width))])
+        for idx, user_id in enumerate(model.user_ids):
+            hist = model.histograms[idx]
+            total = sum(hist) or 1.0
+            writer.writerow([
+                user_id,
+                model.team_names[model.team_of[idx]],
+                *(f'{hist[load] / total:.4f}' if load < len(hist) else '0' for load in range(width))
+            ])
+
+
+def summarize(model, processed, elapsed):
+    mean_loads = []
+    for hist in model.histograms:
+        total = sum(hist)
+        if total:
+            mean_loads.append(sum(load * share for load, share in enumerate(hist)) / total)
+
+    queue_times = sorted(model.queue_times)
+    print(f'events:             {processed} ({processed / elapsed * 60:,.0f}/min)', file=sys.stderr)
+    print(f'reviewers:          {len(model.user_ids)} in {len(model.team_names)} teams', file=sys.stderr)
+    print(f'mean load:          {mean(mean_loads):.3f} (stddev across reviewers {pstdev(mean_loads):.3f})',
+          file=sys.stderr)
+    print(f'max load:           {max(len(hist) for hist in model.histograms) - 1}', file=sys.stderr)
+    if len(queue_times) >= 2:
+        p50, p95 = quantiles(queue_times, n=100)[49], quantiles(queue_times, n=100)[94]
+        print(f'queue time (hours): mean {mean(queue_times):.2f}, p50 {p50:.2f}, p95 {p95:.2f}', file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline reviewer assignment simulator for capacity planning')
+    parser.add_argument('--events', help='NDJSON event stream (create/merge/deactivate/activate), "-" for stdin')
+    parser.add_argument('--roster', help='JSON object {team_name: [user_id, ...]}')
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--team-size', type=int, default=8)
+    parser.add_argument('--weight', choices=sorted(WEIGHTS), default='inverse')
+    parser.add_argument('--review-hours', type=float, default=None,
+                        help='Mean review time per reviewer; when set, merges are simulated from reviewer queues')
+    parser.add_argument('--synthetic', type=int, default=1_000_000, help='Number of synthetic events')
+    parser.add_argument('--creates-per-hour', type=float, default=20.0)
+    parser.add_argument('--churn-per-day', type=float, default=2.0)
+    parser.add_argument('--leave-days', type=float, default=7.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='-', help='CSV with per-reviewer load histograms')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    roster = load_roster(args.roster, args.teams, args.team_size)
+
+    review_hours = args.review_hours
+    if args.events:
+        events = read_events(args.events)
+    else:
+        events = synthetic_events(
+            roster, args.synthetic, args.creates_per_hour, args.churn_per_day, args.leave_days, args.seed
+        )
+        review_hours = review_hours or 2.0
+
+    model = AssignmentModel(roster, WEIGHTS[args.weight], review_hours, args.seed)
+
+    started = time.perf_counter()
+    processed = replay(model, events, review_hours is not None)
+    elapsed = time.perf_counter() - started
+
+    write_histograms(model, args.output)
+    summarize(model, processed, elapsed)
+
+
+if __name__ == '__main__':
+    main()
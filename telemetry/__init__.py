@@ -0,0 +1,8 @@
+from .context import RequestContext, request_context, current_request_id
+from .json_logging import JsonFormatter, setup_logging
+from .slow_queries import install_query_logging
+from .profiling import ProfileStore, RequestProfiler, TaskSampler
+
+
+__all__ = ['RequestContext', 'request_context', 'current_request_id', 'JsonFormatter', 'setup_logging',
+           'install_query_logging', 'ProfileStore', 'RequestProfiler', 'TaskSampler']
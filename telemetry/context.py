@@ -0,0 +1,19 @@
+from contextvars import ContextVar
+from typing import Optional
+
+
+class RequestContext:
+    __slots__ = ('request_id', 'db_queries', 'db_time')
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.db_queries = 0
+        self.db_time = 0.0
+
+
+request_context: ContextVar[Optional[RequestContext]] = ContextVar('request_context', default=None)
+
+
+def current_request_id() -> Optional[str]:
+    context = request_context.get()
+    return context.request_id if context else None
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError:
+    Profiler = None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{getattr(code, "co_qualname", code.co_name)} ({code.co_filename}:{code.co_firstlineno})'.replace(';', ',')
+
+
+def _awaited_frames(coro) -> List:
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None) or getattr(coro, 'ag_frame', None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None) or getattr(coro, 'ag_await', None)
+    return frames
+
+
+class TaskSampler:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.tasks: Dict[asyncio.Task, Tuple[int, Counter]] = {}
+        self.lock = threading.Lock()
+        # Set while any task is profiled, the thread sleeps on it in between
+        self.active = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self, task: asyncio.Task) -> Counter:
+        stacks = Counter()
+        with self.lock:
+            self.tasks[task] = (threading.get_ident(), stacks)
+            self.active.set()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name='task-sampler', daemon=True)
+                self.thread.start()
+        return stacks
+
+    def stop(self, task: asyncio.Task) -> None:
+        with self.lock:
+            self.tasks.pop(task, None)
+            if not self.tasks:
+                self.active.clear()
+
+    def _run(self) -> None:
+        while True:
+            self.active.wait()
+            time.sleep(self.interval)
+            with self.lock:
+                tasks = list(self.tasks.items())
+            if not tasks:
+                continue
+
+            thread_frames = sys._current_frames()
+            for task, (thread_id, stacks) in tasks:
+                stack = self._stack(task, thread_frames.get(thread_id))
+                if stack:
+                    stacks[stack] += 1
+
+    @staticmethod
+    def _stack(task: asyncio.Task, thread_frame) -> str:
+        coro_frames = _awaited_frames(task.get_coro())
+        if not coro_frames:
+            return ''
+
+        if asyncio.current_task(task.get_loop()) is not task or thread_frame is None:
+            return ';'.join([*map(_frame_label, coro_frames), '[await]'])
+
+        frames = []
+        root = coro_frames[0]
+        while thread_frame is not None:
+            frames.append(thread_frame)
+            if thread_frame is root:
+                break
+            thread_frame = thread_frame.f_back
+        return ';'.join(map(_frame_label, reversed(frames)))
+
+
+class RequestProfiler:
+    def __init__(self, sampler: TaskSampler, interval: float):
+        self.sampler = sampler
+        self.interval = interval
+        self.task = None
+        self.profiler = None
+        self.stacks = None
+
+    def start(self) -> None:
+        if Profiler is not None:
+            self.profiler = Profiler(interval=self.interval, async_mode='enabled')
+            self.profiler.start()
+        else:
+            self.task = asyncio.current_task()
+            self.stacks = self.sampler.start(self.task)
+
+    def stop(self) -> Tuple[str, str]:
+        if self.profiler is not None:
+            session = self.profiler.stop()
+            return 'speedscope.json', SpeedscopeRenderer().render(session)
+
+        self.sampler.stop(self.task)
+        return 'folded', ''.join(f'{stack} {count}\n' for stack, count in self.stacks.items())
+
+
+class ProfileStore:
+    def __init__(self, directory: str, keep: int = 100):
+        self.directory = directory
+        self.keep = keep
+
+    def save(self, profile_id: str, extension: str, content: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{profile_id}.{extension}')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        profiles = sorted(os.scandir(self.directory), key=lambda entry: entry.stat().st_mtime)
+        for entry in profiles[:max(0, len(profiles) - self.keep)]:
+            os.remove(entry.path)
+
+        return path
+
+    def find(self, profile_id: str) -> Optional[str]:
+        if not profile_id.isalnum() or not os.path.isdir(self.directory):
+            return None
+
+        for entry in os.scandir(self.directory):
+            if entry.name.split('.', 1)[0] == profile_id:
+                return entry.path
+        return None
+
+    def list(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+
+        profiles = sorted(os.scandir(self.directory), key=lambda entry: entry.stat().st_mtime, reverse=True)
+        return [entry.name for entry in profiles]
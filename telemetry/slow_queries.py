@@ -0,0 +1,48 @@
+import logging
+import random
+import time
+
+from sqlalchemy import event
+
+from telemetry.context import request_context
+
+
+logger = logging.getLogger('db.slow_query')
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def install_query_logging(engine, slow_query_ms: float, sample_rate: float, max_chars: int = 2000) -> None:
+    sync_engine = getattr(engine, 'sync_engine', engine)
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started'].pop()
+
+        stats = request_context.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_time += elapsed
+
+        if elapsed * 1000 >= slow_query_ms and random.random() < sample_rate:
+            logger.warning(
+                'Slow query',
+                extra={
+                    'duration_ms': round(elapsed * 1000, 2),
+                    'statement': _truncate(statement, max_chars),
+                    'parameters': _truncate(repr(parameters), max_chars),
+                    'executemany': executemany,
+                }
+            )
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def _handle_error(exception_context):
+        started = exception_context.connection.info.get('query_started') if exception_context.connection else None
+        if started:
+            started.pop()
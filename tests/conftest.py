@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+
+import asyncpg
+import pytest
+import pytest_asyncio
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEAMS = 40
+USERS_PER_TEAM = 25
+PRS_PER_USER = int(os.environ.get('PERF_PRS_PER_USER', 50))
+ARCHIVED_PER_USER = 5
+
+
+def _pg_bindir():
+    if os.environ.get('PG_BIN'):
+        return os.environ['PG_BIN']
+    # pg_config also ships with client-only packages, so its bindir may lack the server binaries
+    candidates = [os.path.dirname(shutil.which('initdb') or '')]
+    if shutil.which('pg_config'):
+        candidates.append(subprocess.run(['pg_config', '--bindir'], capture_output=True, text=True).stdout.strip())
+    return next((path for path in candidates if path and os.path.exists(os.path.join(path, 'initdb'))), None)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+PG_BIN = _pg_bindir()
+# initdb refuses to run as root, so in containers the cluster is owned by an unprivileged user
+PG_RUN_AS = os.environ.get('PG_TEST_USER', 'nobody') if os.geteuid() == 0 else None
+PG_DIR = None
+
+if PG_BIN and (PG_RUN_AS is None or shutil.which('runuser')):
+    # config.py reads the environment on import, so the throwaway cluster is chosen before the app is imported
+    PG_DIR = tempfile.mkdtemp(prefix='avito-pg-')
+    os.environ.update({
+        'POSTGRES_USER': 'postgres',
+        'POSTGRES_PASSWORD': 'postgres',
+        'POSTGRES_IP': '127.0.0.1',
+        'POSTGRES_PORT': str(_free_port()),
+        'POSTGRES_DB': 'postgres',
+        'API_PORT': '8080',
+        'RATE_LIMITS': '',
+        'ACCESS_LOG_SAMPLE_RATE': '1.0',
+        'PROFILING_ENABLED': 'true',
+        'PROFILE_TOKEN': 'perf',
+        'PROFILE_DIR': os.path.join(PG_DIR, 'profiles'),
+    })
+
+
+def _pg(*args: str) -> None:
+    command = [os.path.join(PG_BIN, args[0]), *args[1:]]
+    if PG_RUN_AS:
+        command = ['runuser', '-u', PG_RUN_AS, '--', *command]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+
+def pytest_unconfigure(config):
+    if PG_DIR:
+        shutil.rmtree(PG_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def postgres_cluster():
+    if PG_DIR is None:
+        pytest.skip('PostgreSQL server binaries not found (set PG_BIN)')
+
+    if PG_RUN_AS:
+        shutil.chown(PG_DIR, PG_RUN_AS)
+    data_dir = os.path.join(PG_DIR, 'data')
+    _pg('initdb', '-D', data_dir, '-U', 'postgres', '-A', 'trust', '-E', 'UTF8', '--no-sync', '--no-instructions')
+    _pg(
+        'pg_ctl', '-D', data_dir, '-l', os.path.join(PG_DIR, 'server.log'), '-w', '-o',
+        f'-p {os.environ["POSTGRES_PORT"]} -k {PG_DIR} -c listen_addresses=127.0.0.1 '
+        f'-c fsync=off -c synchronous_commit=off -c full_page_writes=off',
+        'start'
+    )
+    try:
+        yield
+    finally:
+        _pg('pg_ctl', '-D', data_dir, '-m', 'immediate', 'stop')
+
+
+@pytest.fixture(scope='session')
+def migrated_database(postgres_cluster):
+    subprocess.run(
+        [sys.executable, '-m', 'alembic', 'upgrade', 'head'],
+        cwd=ROOT, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+
+
+SCALE = (TEAMS, USERS_PER_TEAM, PRS_PER_USER)
+
+# Built set-based in SQL, a full dataset loads in a few seconds
+SEED = [
+    ('''
+        INSERT INTO teams (team_name)
+        SELECT 'perf_team_' || t FROM generate_series(0, $1 - 1) t
+    ''', SCALE[:1]),
+    ('''
+        INSERT INTO users (user_id, username, team_pk, is_active)
+        SELECT format('perf_u_%s_%s', t, i), 'User ' || i, teams.id, true
+        FROM generate_series(0, $1 - 1) t
+        CROSS JOIN generate_series(0, $2 - 1) i
+        JOIN teams ON teams.team_name = 'perf_team_' || t
+    ''', SCALE[:2]),
+    ('''
+        INSERT INTO pull_requests (pull_request_id, pull_request_name, author_pk, status, created_at, merged_at)
+        SELECT format('perf_pr_%s_%s_%s', t, i, j), format('Perf change %s', md5(format('%s_%s_%s', t, i, j))),
+               users.id, CASE WHEN j % 2 = 0 THEN 'MERGED' ELSE 'OPEN' END::pr_status_enum,
+               now() - make_interval(mins => (t * $2 + i) * $3 + j),
+               CASE WHEN j % 2 = 0 THEN now() - make_interval(mins => (t * $2 + i) * $3 + j - 1) END
+        FROM generate_series(0, $1 - 1) t
+        CROSS JOIN generate_series(0, $2 - 1) i
+        CROSS JOIN generate_series(0, $3 - 1) j
+        JOIN users ON users.user_id = format('perf_u_%s_%s', t, i)
+    ''', SCALE),
+    # Reviewers of perf_pr_<t>_<i>_<j> are perf_u_<t>_<i + 1> and perf_u_<t>_<i + 2> (modulo team size)
+    ('''
+        INSERT INTO pull_request_reviewers (user_pk, pull_request_pk)
+        SELECT users.id, pull_requests.id
+        FROM generate_series(0, $1 - 1) t
+        CROSS JOIN generate_series(0, $2 - 1) i
+        CROSS JOIN generate_series(0, $3 - 1) j
+        CROSS JOIN generate_series(1, 2) k
+        JOIN pull_requests ON pull_requests.pull_request_id = format('perf_pr_%s_%s_%s', t, i, j)
+        JOIN users ON users.user_id = format('perf_u_%s_%s', t, (i + k) % $2)
+    ''', SCALE),
+    ('''
+        WITH archived AS (
+            INSERT INTO pull_requests_archive
+                (id, pull_request_id, pull_request_name, status, author_pk, created_at, merged_at)
+            SELECT id, pull_request_id, pull_request_name, status, author_pk, created_at, merged_at
+            FROM pull_requests
+            WHERE status = 'MERGED' AND split_part(pull_request_id, '_', 5)::int < $1
+            RETURNING id
+        ), moved AS (
+            DELETE FROM pull_request_reviewers r USING archived a WHERE r.pull_request_pk = a.id
+            RETURNING r.user_pk, r.pull_request_pk
+        )
+        INSERT INTO pull_request_reviewers_archive (user_pk, pull_request_pk)
+        SELECT user_pk, pull_request_pk FROM moved
+    ''', (ARCHIVED_PER_USER * 2,)),
+    ('''
+        DELETE FROM pull_requests p USING pull_requests_archive a WHERE p.id = a.id
+    ''', ()),
+]
+
+
+async def _seed():
+    connection = await asyncpg.connect(
+        user=os.environ['POSTGRES_USER'],
+        host=os.environ['POSTGRES_IP'],
+        port=int(os.environ['POSTGRES_PORT']),
+        database=os.environ['POSTGRES_DB']
+    )
+    try:
+        async with connection.transaction():
+            await connection.execute("SET LOCAL app.skip_review_events = 'on'")
+            for query, args in SEED:
+                await connection.execute(query, *args)
+        await connection.execute('VACUUM ANALYZE')
+    finally:
+        await connection.close()
+
+
+@pytest.fixture(scope='session')
+def seeded_database(migrated_database):
+    asyncio.run(_seed())
+
+
+class QueryLog(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.requests = []
+
+    def emit(self, record):
+        if record.getMessage() == 'Request finished':
+            self.requests.append(record)
+
+
+@pytest_asyncio.fixture(scope='session', loop_scope='session')
+async def asgi_client(seeded_database):
+    import httpx
+    from app import app, lifespan
+
+    access_logger = logging.getLogger('api.access')
+    query_log = QueryLog()
+    access_logger.addHandler(query_log)
+    access_logger.setLevel(logging.INFO)
+
+    try:
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://perf') as client:
+                client.query_log = query_log
+                yield client
+    finally:
+        access_logger.removeHandler(query_log)
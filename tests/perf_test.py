@@ -0,0 +1,116 @@
+import os
+import statistics
+import time
+from typing import Callable, NamedTuple
+
+import pytest
+
+from conftest import USERS_PER_TEAM, PRS_PER_USER
+
+
+ITERATIONS = int(os.environ.get('PERF_ITERATIONS', 5))
+LATENCY_FACTOR = float(os.environ.get('PERF_LATENCY_FACTOR', 1.0))
+
+
+class Budget(NamedTuple):
+    queries: int
+    latency_ms: float
+    request: Callable[[int], dict]
+    status: int = 200
+
+
+def _open_pr(team: int, n: int) -> str:
+    # Open PRs have odd j; every author has PRS_PER_USER // 2 of them
+    i, j = divmod(n, PRS_PER_USER // 2)
+    return f'perf_pr_{team}_{i}_{j * 2 + 1}'
+
+
+def _open_prs(team: int, n: int, size: int):
+    return [_open_pr(team, n * size + k) for k in range(size)]
+
+
+def _reassign(n: int) -> dict:
+    i, j = divmod(n, PRS_PER_USER // 2)
+    return {'json': {'pull_request_id': f'perf_pr_3_{i}_{j * 2 + 1}', 'old_user_id': f'perf_u_3_{(i + 1) % USERS_PER_TEAM}'}}
+
+
+# Every route owns its own teams, so mutating one route's data never changes what another route measures
+BUDGETS = {
+    ('POST', '/pullRequest/create'): Budget(7, 100, lambda n: {'json': {
+        'pull_request_id': f'perf_new_{n}', 'pull_request_name': 'New', 'author_id': f'perf_u_0_{n}'
+    }}, status=201),
+    ('POST', '/pullRequest/merge'): Budget(2, 50, lambda n: {'json': {'pull_request_id': _open_pr(1, n)}}),
+    ('POST', '/pullRequest/mergeBatch'): Budget(2, 150, lambda n: {'json': {'pull_request_ids': _open_prs(2, n, 50)}}),
+    ('POST', '/pullRequest/reassign'): Budget(7, 100, _reassign),
+    ('GET', '/pullRequest/get'): Budget(1, 30, lambda n: {'params': {'pull_request_id': f'perf_pr_4_{n}_1'}}),
+    ('GET', '/pullRequest/search'): Budget(1, 75, lambda n: {'params': {'q': 'change', 'limit': 100}}),
+    ('POST', '/team/add'): Budget(24, 100, lambda n: {'json': {
+        'team_name': f'perf_added_{n}',
+        'members': [{'user_id': f'perf_added_{n}_{m}', 'username': 'New', 'is_active': True} for m in range(20)]
+    }}, status=201),
+    ('GET', '/team/get'): Budget(2, 50, lambda n: {'params': {'team_name': f'perf_team_{5 + n}'}}),
+    ('GET', '/team/members'): Budget(1, 30, lambda n: {'params': {'team_name': f'perf_team_{5 + n}', 'limit': 10}}),
+    ('POST', '/team/setIsActive'): Budget(7, 1500, lambda n: {'json': {
+        'team_name': f'perf_team_{10 + n}', 'is_active': False
+    }}),
+    ('POST', '/users/setIsActive'): Budget(8, 200, lambda n: {'json': {
+        'user_id': f'perf_u_20_{n * 5}', 'is_active': False
+    }}),
+    ('POST', '/users/bulkSetIsActive'): Budget(8, 1000, lambda n: {'json': {
+        'user_ids': [f'perf_u_21_{n * 5 + k}' for k in range(5)], 'is_active': False
+    }}),
+    ('POST', '/users/moveToTeam'): Budget(9, 200, lambda n: {'json': {
+        'user_ids': [f'perf_u_22_{n}'], 'team_name': 'perf_team_23'
+    }}),
+    ('POST', '/users/setAvailability'): Budget(1, 30, lambda n: {'json': {
+        'user_id': f'perf_u_24_{n}', 'max_open_reviews': 5
+    }}),
+    ('GET', '/users/getReview'): Budget(2, 30, lambda n: {'params': {
+        'user_id': f'perf_u_25_{n}', 'include_archived': True
+    }}),
+    ('GET', '/health/live'): Budget(0, 10, lambda n: {}),
+    ('GET', '/health/ready'): Budget(0, 10, lambda n: {}),
+    ('GET', '/health/metrics'): Budget(0, 20, lambda n: {}),
+    ('GET', '/debug/profiles'): Budget(0, 10, lambda n: {'headers': {'X-Profile': 'perf'}}),
+    ('GET', '/debug/profiles/{profile_id}'): Budget(0, 10, lambda n: {'headers': {'X-Profile': 'perf'}}, status=404),
+}
+
+# Long-lived event stream, it never finishes within a request budget
+UNBUDGETED = {('GET', '/users/reviewEvents')}
+
+
+def _routes():
+    from app import app
+    return {
+        (method, route.path)
+        for route in app.routes
+        if hasattr(route, 'methods') and route.include_in_schema
+        for method in route.methods
+    }
+
+
+def test_every_route_has_a_budget():
+    assert _routes() - UNBUDGETED == set(BUDGETS)
+
+
+@pytest.mark.asyncio(loop_scope='session')
+@pytest.mark.parametrize('route', list(BUDGETS), ids=lambda route: f'{route[0]} {route[1]}')
+async def test_route_budget(asgi_client, route):
+    method, path = route
+    budget = BUDGETS[route]
+    url = path.replace('{profile_id}', 'missing')
+
+    latencies = []
+    queries = []
+    for n in range(ITERATIONS):
+        logged = len(asgi_client.query_log.requests)
+        started = time.perf_counter()
+        response = await asgi_client.request(method, url, **budget.request(n))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        assert response.status_code == budget.status, response.text
+        queries.append(sum(record.db_queries for record in asgi_client.query_log.requests[logged:]))
+
+    print(f'{method} {path}: queries={max(queries)} median={statistics.median(latencies):.1f}ms')
+    assert max(queries) <= budget.queries
+    assert statistics.median(latencies) <= budget.latency_ms * LATENCY_FACTOR
@@ -0,0 +1,21 @@
+import asyncio
+
+import pytest
+
+
+@pytest.mark.asyncio(loop_scope='session')
+async def test_concurrent_reassigns_replace_a_reviewer_once(asgi_client):
+    # Team 31 is left alone by the route budgets, perf_u_31_1 reviews perf_pr_31_0_<j>
+    request = {'pull_request_id': 'perf_pr_31_0_1', 'old_user_id': 'perf_u_31_1'}
+
+    responses = await asyncio.gather(*(
+        asgi_client.post('/pullRequest/reassign', json=request) for _ in range(4)
+    ))
+
+    assert sorted(response.status_code for response in responses) == [200, 409, 409, 409]
+    conflicts = [response.json()['detail']['error']['code'] for response in responses if response.status_code == 409]
+    assert conflicts == ['NOT_ASSIGNED'] * 3
+
+    replaced_by = next(response.json()['replaced_by'] for response in responses if response.status_code == 200)
+    pr = (await asgi_client.get('/pullRequest/get', params={'pull_request_id': request['pull_request_id']})).json()
+    assert sorted(pr['assigned_reviewers']) == sorted(['perf_u_31_2', replaced_by])
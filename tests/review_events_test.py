@@ -0,0 +1,87 @@
+import asyncio
+import os
+
+import asyncpg
+import pytest
+
+import api.review_events
+from api.review_events import _replay, user_review_events
+from database.crud.review_event_crud import ReviewEventCrud
+from database.gen_session import SessionLocal
+from database.review_events import EventCursor, ReviewEventHub
+
+
+# Team 30 is left alone by the route budgets: perf_u_30_0 reviews nothing of perf_u_30_5, whose odd PRs are open
+REVIEWER = 'perf_u_30_0'
+
+ASSIGN = '''
+    INSERT INTO pull_request_reviewers (user_pk, pull_request_pk)
+    SELECT users.id, pull_requests.id
+    FROM users, pull_requests
+    WHERE users.user_id = $1 AND pull_requests.pull_request_id = $2
+'''
+
+
+async def _connect() -> asyncpg.Connection:
+    return await asyncpg.connect(
+        user=os.environ['POSTGRES_USER'],
+        host=os.environ['POSTGRES_IP'],
+        port=int(os.environ['POSTGRES_PORT']),
+        database=os.environ['POSTGRES_DB']
+    )
+
+
+async def _replay_all(cursor: EventCursor) -> list:
+    events, horizon, complete = await _replay(REVIEWER, cursor)
+    assert complete
+    cursor.advance(horizon)
+    return [event['pull_request_id'] for event in events]
+
+
+@pytest.mark.asyncio(loop_scope='session')
+async def test_replay_keeps_events_of_transactions_committing_out_of_order(seeded_database):
+    async with SessionLocal() as session:
+        cursor = EventCursor(await ReviewEventCrud.get_horizon(session))
+
+    slow, fast = await _connect(), await _connect()
+    try:
+        # The slow transaction takes the smaller event id, the fast one commits first
+        slow_transaction = slow.transaction()
+        await slow_transaction.start()
+        await slow.execute(ASSIGN, REVIEWER, 'perf_pr_30_5_1')
+        await fast.execute(ASSIGN, REVIEWER, 'perf_pr_30_5_3')
+
+        assert await _replay_all(cursor) == ['perf_pr_30_5_3']
+        resume_from = str(cursor)
+
+        await slow_transaction.commit()
+    finally:
+        await slow.close()
+        await fast.close()
+
+    assert await _replay_all(cursor) == ['perf_pr_30_5_1']
+    assert await _replay_all(cursor) == []
+    # A reconnecting client may see an event twice but never misses one
+    assert sorted(await _replay_all(EventCursor.parse(resume_from))) == ['perf_pr_30_5_1', 'perf_pr_30_5_3']
+
+
+@pytest.mark.asyncio(loop_scope='session')
+async def test_dropped_response_holds_no_stream(seeded_database, monkeypatch):
+    async def connect():
+        await asyncio.Event().wait()
+
+    hub = ReviewEventHub(connect=connect, max_streams=1)
+    monkeypatch.setattr(api.review_events, 'review_event_hub', hub)
+
+    # The client went away before the body started
+    response = await user_review_events(user_id=REVIEWER, last_event_id=None, last_event_id_header=None)
+    del response
+    assert hub.streams == 0
+
+    stream = (await user_review_events(user_id=REVIEWER, last_event_id=None, last_event_id_header=None)).body_iterator
+    assert (await anext(stream)).startswith('retry:')
+    assert hub.streams == 1
+    await stream.aclose()
+    assert hub.streams == 0
+
+    await hub.close()
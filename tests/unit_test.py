@@ -1,26 +1,37 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
 import pytest
-from database.models import PRStatus
+from fastapi import HTTPException, Response
+from starlette.middleware.cors import CORSMiddleware
+import api.health
+from api.health import HealthState, health_ready
+from api.pull_request import _encode_cursor, _decode_cursor
+from api.representation import field_projection
+from api.schemas import UserReviewListSchema
+from assignment import ACTIVE, FALLBACK, Candidate, weighted_sample, weighted_sample_by_keys, select_replacement, \
+    select_reviewers
+from database.crud.team_crud import TeamCrud
 from database.crud.user_crud import UserCrud
-
-
-class MockPR:
-    def __init__(self, status):
-        self.status = status
-
-
-class MockUser:
-    def __init__(self, user_id, open_reviews_count):
-        self.user_id = user_id
-        self.assigned_reviews = [
-            MockPR(PRStatus.OPEN) for _ in range(open_reviews_count)
-        ]
-        self.assigned_reviews.append(MockPR(PRStatus.MERGED))
+from database.review_events import ReviewEventHub, EventCursor, RESYNC, CLOSED
+from middleware import MemoryTokenBuckets, ProfilingMiddleware, LoadSheddingMiddleware, RateLimitMiddleware, \
+    DeadlineMiddleware
+from middleware.compression import accepted_encodings
+from scripts.import_history import read_records
+from telemetry import JsonFormatter, RequestContext, request_context, ProfileStore, TaskSampler
 
 
 @pytest.mark.asyncio
 async def test_select_reviewers_weighted():
-    user_newbie = MockUser(user_id="newbie", open_reviews_count=0)
-    user_vet = MockUser(user_id="vet", open_reviews_count=5)
+    user_newbie = Candidate(user_id="newbie", open_count=0)
+    user_vet = Candidate(user_id="vet", open_count=5)
 
     candidates = [user_newbie, user_vet]
 
@@ -42,7 +53,7 @@ async def test_select_reviewers_weighted():
         assert user_newbie in selected_2
         assert user_vet in selected_2
 
-        user_newbie_2 = MockUser(user_id="newbie2", open_reviews_count=1)
+        user_newbie_2 = Candidate(user_id="newbie2", open_count=1)
         candidates_real = [user_newbie, user_newbie_2, user_vet]
 
         for _ in range(100):
@@ -54,3 +65,310 @@ async def test_select_reviewers_weighted():
     print(f"Selections: {selections}")
     assert selections.get("vet", 0) < selections.get("newbie", 0)
     assert selections.get("vet", 0) < selections.get("newbie2", 0)
+
+
+def test_weighted_sample_without_replacement():
+    assert weighted_sample([]) == []
+    assert weighted_sample([3, 0]) == [0, 1]
+
+    for _ in range(100):
+        picked = weighted_sample([0, 1, 5, 2], k=3)
+        assert len(picked) == 3
+        assert len(set(picked)) == 3
+        assert all(0 <= idx < 4 for idx in picked)
+
+    assert weighted_sample([7, 0, 7], k=1, weight=lambda n: 0.0 if n else 1.0) == [1]
+
+
+def test_select_replacement_least_loaded():
+    candidates = [
+        Candidate("b", open_count=1),
+        Candidate("a", open_count=1),
+        Candidate("c", open_count=0, flags=0),
+        Candidate("d", open_count=3),
+    ]
+
+    assert select_replacement([]) is None
+    assert select_replacement(candidates).user_id == "a"
+    assert select_replacement(candidates, exclude_ids={"a", "b"}).user_id == "d"
+    assert select_replacement(candidates, exclude_ids={"a", "b", "d"}) is None
+
+    capped = [Candidate("a", open_count=2, max_open=2), Candidate("b", open_count=3, max_open=4)]
+    assert select_replacement(capped).user_id == "b"
+    assert select_reviewers(capped) == [capped[1]]
+
+    ranked = [Candidate("z", open_count=4), Candidate("a", open_count=0, flags=ACTIVE | FALLBACK)]
+    assert select_replacement(ranked).user_id == "z"
+    assert select_replacement(ranked, exclude_ids={"z"}).user_id == "a"
+
+
+@pytest.mark.asyncio
+async def test_memory_token_bucket():
+    now = [100.0]
+    buckets = MemoryTokenBuckets(clock=lambda: now[0])
+
+    assert [await buckets.acquire("client:a", rate=1, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert await buckets.acquire("client:a", rate=1, burst=3) == 1.0
+    assert await buckets.acquire("client:b", rate=1, burst=3) == 0.0
+
+    now[0] += 0.5
+    assert await buckets.acquire("client:a", rate=1, burst=3) == 0.5
+
+    now[0] += 2
+    assert await buckets.acquire("client:a", rate=1, burst=3) == 0.0
+
+
+def test_json_formatter_includes_request_id():
+    record = logging.makeLogRecord({"name": "api.access", "levelname": "INFO", "msg": "done %s", "args": (1,),
+                                    "status": 200})
+
+    token = request_context.set(RequestContext("req-1"))
+    try:
+        entry = json.loads(JsonFormatter().format(record))
+    finally:
+        request_context.reset(token)
+
+    assert entry["message"] == "done 1"
+    assert entry["request_id"] == "req-1"
+    assert entry["status"] == 200
+    assert "request_id" not in json.loads(JsonFormatter().format(record))
+
+
+def test_profile_store_keeps_latest(tmp_path):
+    store = ProfileStore(str(tmp_path), keep=2)
+
+    for idx, profile_id in enumerate(["a1", "b2", "c3"]):
+        path = store.save(profile_id, "folded", f"main;handler {idx}\n")
+        os.utime(path, (idx, idx))
+
+    assert sorted(store.list()) == ["b2.folded", "c3.folded"]
+    assert store.find("a1") is None
+    assert store.find("c3").endswith("c3.folded")
+    assert store.find("../c3") is None
+
+
+def test_cors_wraps_rejections_and_shedding_precedes_rate_limits():
+    from app import app
+
+    # user_middleware lists the outermost middleware first
+    order = [middleware.cls for middleware in app.user_middleware]
+
+    assert order[0] is CORSMiddleware
+    assert order.index(LoadSheddingMiddleware) < order.index(RateLimitMiddleware) < order.index(DeadlineMiddleware)
+
+
+@pytest.mark.asyncio
+async def test_readiness_hides_database_errors(monkeypatch, caplog):
+    state = HealthState()
+    monkeypatch.setattr(api.health, "health_state", state)
+
+    with caplog.at_level(logging.WARNING, logger="api.health"):
+        state.record_ping(OSError("connect to db.internal:5432 as avito_admin failed"))
+    response = Response()
+    body = (await health_ready(response)).model_dump_json()
+
+    assert response.status_code == 503
+    assert "db.internal" not in body and '"db_ok":false' in body
+    assert "db.internal" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_task_sampler_idles_between_profiles():
+    sampler = TaskSampler(interval=0.001)
+    task = asyncio.current_task()
+
+    stacks = sampler.start(task)
+    deadline = time.monotonic() + 1
+    while not stacks and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sampler.stop(task)
+
+    assert any("test_task_sampler_idles_between_profiles" in stack for stack in stacks)
+    assert not sampler.active.is_set()
+
+    # With nothing to profile the thread blocks on the event instead of polling
+    time.sleep(0.05)
+    frame = sys._current_frames()[sampler.thread.ident]
+    assert frame.f_code.co_name == "wait" and frame.f_back.f_code.co_name in ("wait", "_run")
+
+
+def test_profiling_requires_token(tmp_path):
+    def scope(path, *headers):
+        return {"type": "http", "path": path, "headers": list(headers)}
+
+    middleware = ProfilingMiddleware(None, ProfileStore(str(tmp_path)), token="s3cret")
+    assert middleware.requested(scope("/team/get", (b"x-profile", b"s3cret")))
+    assert not middleware.requested(scope("/team/get", (b"x-profile", b"1")))
+    assert not middleware.requested(scope("/team/get"))
+    assert not middleware.requested(scope("/debug/profiles", (b"x-profile", b"s3cret")))
+
+    middleware = ProfilingMiddleware(None, ProfileStore(str(tmp_path)))
+    assert not middleware.requested(scope("/team/get", (b"x-profile", b"1")))
+
+
+def test_key_sampler_matches_sequential_sampler():
+    open_counts = [0, 1, 3, 6]
+    trials = 20000
+
+    def pair_frequencies(sampler):
+        counts = {}
+        for _ in range(trials):
+            pair = tuple(sorted(sampler(open_counts, k=2)))
+            counts[pair] = counts.get(pair, 0) + 1
+        return counts
+
+    sequential = pair_frequencies(weighted_sample)
+    by_keys = pair_frequencies(weighted_sample_by_keys)
+
+    for pair in set(sequential) | set(by_keys):
+        p = sequential.get(pair, 0) / trials
+        q = by_keys.get(pair, 0) / trials
+        stderr = math.sqrt(max(p * (1 - p), 1e-4) * 2 / trials)
+        assert abs(p - q) < 5 * stderr, (pair, p, q)
+
+
+def test_import_reads_csv_and_ndjson_alike(tmp_path):
+    columns = ["user_id", "username", "team_name", "is_active"]
+    csv_path = tmp_path / "users.csv"
+    csv_path.write_text("user_id,team_name,username,is_active\nu1,backend,Alice,true\nu2,backend,Bob,\n")
+    ndjson_path = tmp_path / "users.ndjson"
+    ndjson_path.write_text(
+        '{"user_id": "u1", "username": "Alice", "team_name": "backend", "is_active": true}\n'
+        '\n'
+        '{"user_id": "u2", "username": "Bob", "team_name": "backend"}\n'
+    )
+
+    expected = [("u1", "Alice", "backend", "true"), ("u2", "Bob", "backend", None)]
+    assert list(read_records(str(csv_path), columns)) == expected
+    assert list(read_records(str(ndjson_path), columns)) == expected
+
+
+def test_search_cursor_round_trip():
+    row = SimpleNamespace(created_at=datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc), id=42)
+
+    assert _decode_cursor(_encode_cursor(row)) == (row.created_at, row.id)
+
+    with pytest.raises(HTTPException) as _e:
+        _decode_cursor('not-a-cursor')
+    assert _e.value.status_code == 400
+
+
+def test_field_projection_and_encoding_negotiation():
+    assert field_projection(UserReviewListSchema, 'user_id,pull_requests.pull_request_id,pull_requests.status') == {
+        'user_id': True,
+        'pull_requests': {'__all__': {'pull_request_id': True, 'status': True}}
+    }
+    with pytest.raises(ValueError):
+        field_projection(UserReviewListSchema, 'user_id.length')
+
+    assert accepted_encodings('gzip;q=0.5, br, identity;q=0') == {'gzip': 0.5, 'br': 1.0, 'identity': 0.0}
+
+
+@pytest.mark.asyncio
+async def test_lock_assignments_covers_fallback_teams():
+    locked = []
+
+    class Session:
+        async def execute(self, statement, params):
+            locked.append(params["team_name"])
+
+    fallback_teams = {"payments": ["core", "payments"], "*": ["platform"]}
+    await TeamCrud.lock_assignments(Session(), ["search", "payments", "search"], fallback_teams)
+
+    assert locked == ["core", "payments", "platform", "search"]
+
+
+def _event_hub(**kwargs) -> ReviewEventHub:
+    async def connect():
+        await asyncio.Event().wait()
+
+    return ReviewEventHub(connect=connect, **kwargs)
+
+
+def _notify(hub: ReviewEventHub, **event):
+    hub._dispatch(None, 0, "review_events", json.dumps(event))
+
+
+def _drain(queue: asyncio.Queue) -> list:
+    return [queue.get_nowait() for _ in range(queue.qsize())]
+
+
+@pytest.mark.asyncio
+async def test_review_event_hub_dispatch_and_overflow():
+    hub = _event_hub(queue_size=2)
+    queue_a, queue_b = hub.subscribe("a"), hub.subscribe("b")
+
+    _notify(hub, user_id="a", id=1, xid=10, kind="assigned")
+    assert [event["id"] for event in _drain(queue_a)] == [1]
+    assert queue_b.empty()
+
+    for event_id in range(2, 5):
+        _notify(hub, user_id="a", id=event_id, xid=10, kind="assigned")
+    assert _drain(queue_a) == [RESYNC]
+
+    hub.unsubscribe("a", queue_a)
+    _notify(hub, user_id="a", id=5, xid=10, kind="assigned")
+    assert queue_a.empty()
+    assert hub.streams == 1
+
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_review_event_hub_closes_streams():
+    hub = _event_hub(queue_size=2)
+    queue = hub.subscribe("a")
+    _notify(hub, user_id="a", id=1, xid=10, kind="assigned")
+
+    await hub.close()
+
+    assert _drain(queue) == [CLOSED]
+    assert hub.task.cancelled()
+    assert hub.subscribe("a") is None
+
+
+@pytest.mark.asyncio
+async def test_review_event_listener_survives_unexpected_errors():
+    attempts = []
+
+    async def connect():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("driver bug")
+        await asyncio.Event().wait()
+
+    hub = ReviewEventHub(connect=connect)
+    queue = hub.subscribe("a")
+
+    await asyncio.sleep(0.3)
+    assert len(attempts) == 2
+    assert not hub.task.done()
+
+    hub._dispatch(None, 0, "review_events", "not json")
+    hub._dispatch(None, 0, "review_events", json.dumps({"id": 1}))
+    _notify(hub, user_id="a", id=2, xid=10, kind="assigned")
+    assert [event["id"] for event in _drain(queue)] == [2]
+
+    await hub.close()
+
+
+def test_event_cursor_waits_for_older_transactions():
+    # Transaction 10 took event ids 100..101 but commits after transaction 11 with event 201
+    cursor = EventCursor(10)
+
+    assert cursor.accept({"id": 201, "xid": 11})
+    assert not cursor.accept({"id": 201, "xid": 11})
+    assert not cursor.advance(10)
+
+    resumed = EventCursor.parse(str(cursor))
+    assert [resumed.accept({"id": event_id, "xid": 10}) for event_id in (100, 101)] == [True, True]
+    assert [cursor.accept({"id": event_id, "xid": 10}) for event_id in (100, 101)] == [True, True]
+
+    assert cursor.advance(12)
+    assert cursor.seen == {}
+    assert not cursor.accept({"id": 101, "xid": 10})
+    assert str(cursor) == "12"
+
+    for value in ("", "abc", "-1", "1_2"):
+        with pytest.raises(ValueError):
+            EventCursor.parse(value)